@@ -1,58 +1,392 @@
 import random
+import secrets
 import math
 import os
+import io
+import sys
+import struct
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from typing import Tuple
 
+try:
+    import fcntl
+except ImportError:  # fcntl só existe em POSIX: sem ele, a gravação do cache não usa trava
+    fcntl = None
+
+# Tabelas pré-calculadas byte -> 8 caracteres '0'/'1' (texto e ASCII)
+BITS_TEXT_TABLE = tuple(format(i, '08b') for i in range(256))
+BITS_ASCII_TABLE = tuple(bits.encode('ascii') for bits in BITS_TEXT_TABLE)
+
+
+def _small_primes(limit: int) -> Tuple[int, ...]:
+    """Crivo de Eratóstenes: todos os primos menores que limit"""
+    sieve = bytearray([1]) * limit
+    sieve[0:2] = b'\x00\x00'
+    for i in range(2, math.isqrt(limit - 1) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return tuple(i for i, is_p in enumerate(sieve) if is_p)
+
+
+# Primos pequenos usados como pré-filtro antes do Miller-Rabin
+SMALL_PRIMES = _small_primes(2000)
+
+# Primos ímpares pequenos com o inverso de 4 módulo cada um, usados pelo crivo
+# segmentado da busca por primos ≡ 3 (mod 4)
+SIEVE_PRIMES = tuple((prime, pow(4, -1, prime)) for prime in SMALL_PRIMES[1:])
+
+# Quantidade de candidatos ≡ 3 (mod 4) marcados por janela do crivo
+SIEVE_WINDOW = 4096
+
+# Menor tamanho com pelo menos dois primos de Blum de dois bits altos ligados
+# (103, 107 e 127): abaixo disso não há p ≠ q, ou nem há primos (4 bits só gera 15)
+MIN_PRIME_BITS = 7
+
+# Formato do arquivo de estado: assinatura, cabeçalho fixo e inteiros com prefixo de tamanho
+STATE_MAGIC = b'BBS1'
+STATE_HEADER = struct.Struct('>BBQQ')  # bits_per_step, pending_count, bits_generated, output_bytes
+STATE_INT_LENGTH = struct.Struct('>I')
+
+# Cache em memória dos arquivos de pares de primos já lidos, por caminho
+_PRIME_CACHE = {}
+
+# Bases que tornam o Miller-Rabin determinístico para n < 3.3 * 10^24
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+MILLER_RABIN_DETERMINISTIC_LIMIT = 3317044064679887385961981
+
+# Rodadas com bases aleatórias para números acima do limite determinístico
+MILLER_RABIN_ROUNDS = 40
+
+
+def _fill_bytes(out, n: int, x: int, k: int, pending_bits: int, pending_count: int) -> Tuple[int, int, int]:
+    """
+    Núcleo em lote do BBS: preenche o memoryview out a partir do estado x
+
+    Todas as quadraturas são feitas em um único laço com variáveis locais.
+    Retorna o novo (estado, bits_pendentes, quantidade_pendente).
+    """
+    num_bytes = len(out)
+    
+    if k == 1 and pending_count == 0:
+        # Caminho rápido (padrão BBS): 8 quadraturas por byte, desenroladas
+        for i in range(num_bytes):
+            x = x * x % n; b = x & 1
+            x = x * x % n; b = (b << 1) | (x & 1)
+            x = x * x % n; b = (b << 1) | (x & 1)
+            x = x * x % n; b = (b << 1) | (x & 1)
+            x = x * x % n; b = (b << 1) | (x & 1)
+            x = x * x % n; b = (b << 1) | (x & 1)
+            x = x * x % n; b = (b << 1) | (x & 1)
+            x = x * x % n; b = (b << 1) | (x & 1)
+            out[i] = b
+        return x, 0, 0
+    
+    # Caminho genérico: acumula k bits por quadratura e retira 8 por byte,
+    # aproveitando os bits pendentes de chamadas anteriores
+    mask = (1 << k) - 1
+    acc_len = pending_count
+    acc = pending_bits & ((1 << acc_len) - 1)
+    for i in range(num_bytes):
+        while acc_len < 8:
+            x = x * x % n
+            acc = (acc << k) | (x & mask)
+            acc_len += k
+        acc_len -= 8
+        out[i] = acc >> acc_len
+        acc &= (1 << acc_len) - 1
+    return x, acc, acc_len
+
+
+def _position_at(n: int, carmichael: int, x0: int, k: int, bit_index: int) -> Tuple[int, int, int]:
+    """
+    Calcula (estado, bits_pendentes, quantidade_pendente) para que o próximo
+    bit gerado seja o de índice bit_index, usando x_i = x_0^(2^i mod λ(n)) mod n
+    """
+    steps, offset = divmod(bit_index, k)
+    x = pow(x0, pow(2, steps, carmichael), n)
+    if offset == 0:
+        return x, 0, 0
+    
+    # Posição no meio dos k bits de uma quadratura: executa-a e descarta os já entregues
+    x = x * x % n
+    return x, x & ((1 << k) - 1), k - offset
+
+
+def _generate_segment(n: int, carmichael: int, x0: int, k: int, start_bit: int, num_bytes: int) -> bytearray:
+    """
+    Gera num_bytes bytes a partir do bit start_bit (executado nos processos de trabalho)
+    """
+    x, pending_bits, pending_count = _position_at(n, carmichael, x0, k, start_bit)
+    segment = bytearray(num_bytes)
+    _fill_bytes(memoryview(segment), n, x, k, pending_bits, pending_count)
+    return segment
+
+
 class BlumBlumShub:
-    def __init__(self, min_prime=10000):
+    # Tamanho dos blocos gerados de uma vez pelo núcleo em lote
+    CHUNK_SIZE = 64 * 1024  # 64KB
+
+    def __init__(self, min_prime=10000, bits_per_step=1, bits=None,
+                 p=None, q=None, s=None, prime_cache=None, verbose=False):
         """
         Inicializa o gerador BBS encontrando automaticamente p, q e s adequados
+
+        Args:
+            min_prime: Valor mínimo para os primos p e q
+            bits_per_step: Quantidade k de bits menos significativos extraídos
+                a cada quadratura (1 <= k <= floor(log2(log2 n)))
+            bits: Se informado, p e q são primos de Blum aleatórios com esse
+                número de bits (ex.: 512, 1024, 2048) e min_prime é ignorado
+            p, q: Primos explícitos (validados, sem busca)
+            s: Seed explícito (validado); exige p e q
+            prime_cache: Arquivo JSON com pares de primos já gerados por tamanho
+                em bits; usado junto com bits para evitar nova busca
+            verbose: Se True, mostra o processo de geração e os parâmetros
         """
         self.min_prime = min_prime
-        
-        # Gera automaticamente p e q e calcula n
-        self.p, self.q = self.generate_suitable_primes()
+        self.bits = bits
+        self.prime_cache = prime_cache
+        self.verbose = verbose
+        
+        if (p is None) != (q is None):
+            raise ValueError("p e q devem ser informados juntos")
+        if s is not None and p is None:
+            raise ValueError("O seed s exige p e q explícitos")
+        
+        if p is not None:
+            # Parâmetros explícitos: apenas valida
+            self.p, self.q = self.validate_primes(p, q)
+        else:
+            # Gera automaticamente p e q
+            self.p, self.q = self.generate_suitable_primes()
         self.n = self.p * self.q
         
-        # Gera automaticamente o seed s
-        self.s = self.generate_seed()
+        if s is not None:
+            self.s = self.validate_seed(s)
+        else:
+            # Gera automaticamente o seed s
+            self.s = self.generate_seed()
+        
+        self._setup_state(bits_per_step)
+        if self.verbose:
+            self.print_parameters()
+    
+    @classmethod
+    def from_params(cls, p: int, q: int, s: int, bits_per_step: int = 1, verbose: bool = False) -> 'BlumBlumShub':
+        """
+        Cria um gerador a partir de p, q e s conhecidos, sem nenhuma busca
+        """
+        return cls(bits_per_step=bits_per_step, p=p, q=q, s=s, verbose=verbose)
+    
+    def _log(self, message: str):
+        """Mostra mensagens de progresso apenas no modo verbose"""
+        if self.verbose:
+            print(message)
+    
+    def validate_primes(self, p: int, q: int) -> Tuple[int, int]:
+        """
+        Verifica se p e q são primos de Blum distintos (primos ≡ 3 (mod 4))
+        """
+        for name, value in (("p", p), ("q", q)):
+            if value % 4 != 3 or not self.is_prime(value):
+                raise ValueError(f"{name} = {value} não é um primo ≡ 3 (mod 4)")
+        if p == q:
+            raise ValueError("p e q devem ser diferentes")
+        return p, q
+    
+    def validate_seed(self, s: int) -> int:
+        """
+        Verifica se o seed satisfaz 1 < s < n e gcd(s, n) = 1
+        """
+        if not 1 < s < self.n:
+            raise ValueError("O seed deve satisfazer 1 < s < n")
+        if math.gcd(s, self.n) != 1:
+            raise ValueError("O seed deve ser coprimo com n")
+        return s
+    
+    def _setup_state(self, bits_per_step: int):
+        """
+        Configura o modo de extração e o estado inicial a partir de p, q, n e s
+        """
+        # Modo de extração: k bits por quadratura
+        max_k = self.max_bits_per_step()
+        if not 1 <= bits_per_step <= max_k:
+            raise ValueError(f"bits_per_step deve estar entre 1 e {max_k} para n de {self.n.bit_length()} bits")
+        self.bits_per_step = bits_per_step
+        self.bits_mask = (1 << bits_per_step) - 1
         
         # Estado inicial
         self.current_state = (self.s * self.s) % self.n
         
+        # λ(n) calculado uma única vez (usado nos saltos de seek/state_at)
+        self._carmichael = math.lcm(self.p - 1, self.q - 1)
+        
+        # Bits extraídos da última quadratura e ainda não entregues
+        self.pending_bits = 0
+        self.pending_count = 0
+        
         # Estatísticas
         self.bits_generated = 0
-        
-        self.print_parameters()
+    
+    def save_state(self, path: str, output_bytes: int = 0):
+        """
+        Salva p, q, s, o estado atual e a contagem de bits em formato binário compacto
+
+        Args:
+            path: Arquivo de destino (substituído de forma atômica)
+            output_bytes: Bytes de saída já gravados até este ponto (usado ao retomar arquivos)
+        """
+        pending_bits = self.pending_bits & ((1 << self.pending_count) - 1)
+        data = bytearray(STATE_MAGIC)
+        data += STATE_HEADER.pack(self.bits_per_step, self.pending_count,
+                                  self.bits_generated, output_bytes)
+        for value in (self.p, self.q, self.s, self.current_state, pending_bits):
+            raw = value.to_bytes((value.bit_length() + 7) // 8, 'big')
+            data += STATE_INT_LENGTH.pack(len(raw)) + raw
+        
+        # Arquivo temporário exclusivo: gravações simultâneas não se sobrepõem
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.bbs-state-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+    
+    @staticmethod
+    def _read_state(path: str) -> dict:
+        """Lê um arquivo gerado por save_state"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        
+        if data[:len(STATE_MAGIC)] != STATE_MAGIC:
+            raise ValueError(f"Arquivo de estado BBS inválido: {path}")
+        offset = len(STATE_MAGIC)
+        bits_per_step, pending_count, bits_generated, output_bytes = STATE_HEADER.unpack_from(data, offset)
+        offset += STATE_HEADER.size
+        
+        values = []
+        for _ in range(5):
+            (length,) = STATE_INT_LENGTH.unpack_from(data, offset)
+            offset += STATE_INT_LENGTH.size
+            values.append(int.from_bytes(data[offset:offset + length], 'big'))
+            offset += length
+        p, q, s, current_state, pending_bits = values
+        
+        return {
+            'p': p, 'q': q, 's': s, 'bits_per_step': bits_per_step,
+            'current_state': current_state, 'pending_bits': pending_bits,
+            'pending_count': pending_count, 'bits_generated': bits_generated,
+            'output_bytes': output_bytes,
+        }
+    
+    def _restore_state(self, state: dict):
+        """Restaura a posição na sequência a partir de um estado lido por _read_state"""
+        self.current_state = state['current_state']
+        self.pending_bits = state['pending_bits']
+        self.pending_count = state['pending_count']
+        self.bits_generated = state['bits_generated']
+    
+    @classmethod
+    def load_state(cls, path: str) -> 'BlumBlumShub':
+        """
+        Recria um gerador salvo com save_state, sem buscar primos nem seed
+        """
+        state = cls._read_state(path)
+        bbs = cls.from_params(state['p'], state['q'], state['s'], state['bits_per_step'])
+        bbs._restore_state(state)
+        return bbs
     
     def is_prime(self, n: int) -> bool:
-        """Teste de primalidade otimizado"""
+        """
+        Teste de primalidade: divisão por primos pequenos seguida de Miller-Rabin
+        (determinístico até 3.3 * 10^24, probabilístico com 40 rodadas acima disso)
+        """
         if n < 2:
             return False
-        if n == 2 or n == 3:
+        
+        # Pré-filtro: descarta rapidamente a maioria dos compostos
+        for prime in SMALL_PRIMES:
+            if n % prime == 0:
+                return n == prime
+        if n < SMALL_PRIMES[-1] ** 2:
             return True
-        if n % 2 == 0 or n % 3 == 0:
-            return False
         
-        i = 5
-        while i * i <= n:
-            if n % i == 0 or n % (i + 2) == 0:
+        # Escreve n - 1 = d * 2^r com d ímpar
+        d = n - 1
+        r = 0
+        while d % 2 == 0:
+            d //= 2
+            r += 1
+        
+        if n < MILLER_RABIN_DETERMINISTIC_LIMIT:
+            bases = MILLER_RABIN_BASES
+        else:
+            bases = (2 + secrets.randbelow(n - 3) for _ in range(MILLER_RABIN_ROUNDS))
+        
+        for a in bases:
+            x = pow(a, d, n)
+            if x == 1 or x == n - 1:
+                continue
+            for _ in range(r - 1):
+                x = x * x % n
+                if x == n - 1:
+                    break
+            else:
                 return False
-            i += 6
         return True
     
+    def random_blum_prime(self, bits: int) -> int:
+        """
+        Sorteia (com secrets) um primo aleatório de exatamente `bits` bits
+        tal que p ≡ 3 (mod 4)
+        """
+        if bits < MIN_PRIME_BITS:
+            raise ValueError(f"Primos de Blum precisam de pelo menos {MIN_PRIME_BITS} bits")
+        
+        # Dois bits mais altos ligados garantem que p * q tenha 2 * bits bits
+        top_bits = 3 << (bits - 2)
+        while True:
+            candidate = secrets.randbits(bits) | top_bits | 3
+            if self.is_prime(candidate):
+                return candidate
+    
     def find_next_prime_congruent_3_mod_4(self, start: int) -> int:
         """
         Encontra o próximo primo p tal que p ≡ 3 (mod 4) e p >= start
+
+        Crivo segmentado: percorre apenas candidatos ≡ 3 (mod 4) em passos de 4,
+        marca numa janela (bytearray) os múltiplos dos primos pequenos e só
+        aplica o teste de primalidade completo aos sobreviventes.
         """
-        candidate = start
-        if candidate % 2 == 0:
-            candidate += 1
+        # Primeiro candidato ≡ 3 (mod 4) maior ou igual a start
+        base = start + (3 - start) % 4
         
         while True:
-            if candidate % 4 == 3 and self.is_prime(candidate):
-                return candidate
-            candidate += 2  # Só testa números ímpares
+            # window[j] representa o candidato base + 4 * j
+            window = bytearray([1]) * SIEVE_WINDOW
+            for prime, inv4 in SIEVE_PRIMES:
+                # Menor j com base + 4j ≡ 0 (mod prime)
+                j = (-base * inv4) % prime
+                if base + 4 * j == prime:
+                    j += prime  # O próprio primo não é composto
+                if j < SIEVE_WINDOW:
+                    window[j::prime] = bytes(len(range(j, SIEVE_WINDOW, prime)))
+            
+            for j in range(SIEVE_WINDOW):
+                if window[j]:
+                    candidate = base + 4 * j
+                    if self.is_prime(candidate):
+                        return candidate
+            
+            base += 4 * SIEVE_WINDOW
     
     def generate_suitable_primes(self) -> Tuple[int, int]:
         """
@@ -62,7 +396,25 @@ class BlumBlumShub:
         - p ≠ q
         - Diferença significativa entre p e q para melhor segurança
         """
-        print("Procurando primos adequados para BBS...")
+        self._log("Procurando primos adequados para BBS...")
+        
+        if self.bits is not None:
+            cached_pairs = self._cached_prime_pairs()
+            if cached_pairs:
+                p, q = secrets.choice(cached_pairs)
+                self._log(f"Primos de {self.bits} bits obtidos do cache: p = {p}, q = {q}")
+                return p, q
+            
+            # Primos aleatórios do tamanho pedido
+            p = self.random_blum_prime(self.bits)
+            q = self.random_blum_prime(self.bits)
+            while q == p:
+                q = self.random_blum_prime(self.bits)
+            
+            self._log(f"Primos de {self.bits} bits encontrados: p = {p}, q = {q}")
+            self._log(f"Verificação: p mod 4 = {p % 4}, q mod 4 = {q % 4}")
+            self._store_prime_pair(p, q)
+            return p, q
         
         # Encontra p
         p = self.find_next_prime_congruent_3_mod_4(self.min_prime + 1)
@@ -77,12 +429,71 @@ class BlumBlumShub:
         while abs(p - q) < min_diff:
             q = self.find_next_prime_congruent_3_mod_4(q + 2)
         
-        print(f"Primos encontrados: p = {p}, q = {q}")
-        print(f"Diferença: |p - q| = {abs(p - q)}")
-        print(f"Verificação: p mod 4 = {p % 4}, q mod 4 = {q % 4}")
+        self._log(f"Primos encontrados: p = {p}, q = {q}")
+        self._log(f"Diferença: |p - q| = {abs(p - q)}")
+        self._log(f"Verificação: p mod 4 = {p % 4}, q mod 4 = {q % 4}")
         
         return p, q
     
+    @staticmethod
+    def _read_prime_cache_file(path: str) -> dict:
+        """Lê o arquivo de cache; arquivo ausente ou corrompido vale como cache vazio"""
+        try:
+            with open(path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+    
+    def _load_prime_cache(self) -> dict:
+        """Lê (uma vez por processo) o arquivo de cache de pares de primos"""
+        if self.prime_cache not in _PRIME_CACHE:
+            _PRIME_CACHE[self.prime_cache] = self._read_prime_cache_file(self.prime_cache)
+        return _PRIME_CACHE[self.prime_cache]
+    
+    def _cached_prime_pairs(self) -> list:
+        """Pares (p, q) já gerados para o tamanho self.bits"""
+        if self.prime_cache is None:
+            return []
+        return [tuple(pair) for pair in self._load_prime_cache().get(str(self.bits), [])]
+    
+    def _store_prime_pair(self, p: int, q: int):
+        """
+        Adiciona um novo par ao cache em disco, seguro entre processos: sob uma
+        trava exclusiva (arquivo .lock), relê o cache atual, acrescenta o par e
+        grava num arquivo temporário único antes de substituir o original.
+        Falhas de gravação não impedem a construção do gerador.
+        """
+        if self.prime_cache is None:
+            return
+        try:
+            with open(self.prime_cache + '.lock', 'a') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                
+                # Mescla com o que outros processos gravaram desde a última leitura
+                cache = self._read_prime_cache_file(self.prime_cache)
+                pairs = cache.setdefault(str(self.bits), [])
+                if [p, q] not in pairs:
+                    pairs.append([p, q])
+                
+                directory = os.path.dirname(os.path.abspath(self.prime_cache))
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.primes-', suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump(cache, f)
+                    os.replace(temp_path, self.prime_cache)
+                except BaseException:
+                    if os.path.exists(temp_path):
+                        os.unlink(temp_path)
+                    raise
+        except OSError as e:
+            self._log(f"Aviso: não foi possível gravar o cache de primos ({e})")
+            _PRIME_CACHE.setdefault(self.prime_cache, {}).setdefault(str(self.bits), []).append([p, q])
+            return
+        
+        _PRIME_CACHE[self.prime_cache] = cache
+    
     def generate_seed(self) -> int:
         """
         Gera um seed s adequado com melhor distribuição:
@@ -90,7 +501,7 @@ class BlumBlumShub:
         - gcd(s, n) = 1
         - s deve ser escolhido de forma criptograficamente segura
         """
-        print("Gerando seed adequado...")
+        self._log("Gerando seed adequado...")
         
         # Usa diferentes estratégias para encontrar um bom seed
         max_attempts = 10000
@@ -101,21 +512,21 @@ class BlumBlumShub:
                 # Gera um número grande próximo a n/2 para melhor distribuição
                 min_val = self.n // 4
                 max_val = (3 * self.n) // 4
-                s = random.randint(min_val, max_val)
+                s = min_val + secrets.randbelow(max_val - min_val + 1)
             else:
                 # Estratégia 2: números menores mas ainda adequados
-                s = random.randint(self.n // 10, self.n - 1)
+                s = self.n // 10 + secrets.randbelow(self.n - 1 - self.n // 10 + 1)
             
             # Verifica se é coprimo com n
             if math.gcd(s, self.n) == 1:
                 # Verifica se não é um quadrado perfeito
-                sqrt_s = int(math.sqrt(s))
+                sqrt_s = math.isqrt(s)
                 if sqrt_s * sqrt_s != s:
                     # Teste adicional: verifica se o seed inicial produz boa distribuição
                     x0 = (s * s) % self.n
                     if x0 > self.n // 10:  # Evita valores muito pequenos
-                        print(f"Seed encontrado após {attempt + 1} tentativas: s = {s}")
-                        print(f"Verificações: gcd(s, n) = {math.gcd(s, self.n)}, x₀ = {x0}")
+                        self._log(f"Seed encontrado após {attempt + 1} tentativas: s = {s}")
+                        self._log(f"Verificações: gcd(s, n) = {math.gcd(s, self.n)}, x₀ = {x0}")
                         return s
         
         raise ValueError("Não foi possível encontrar um seed adequado após muitas tentativas")
@@ -129,17 +540,62 @@ class BlumBlumShub:
         print(f"s (seed) = {self.s}")
         print(f"x₀ = s² mod n = {self.current_state}")
         print(f"Tamanho de n: {self.n.bit_length()} bits")
+        print(f"Bits por quadratura: {self.bits_per_step}")
     
-    def next_bit(self) -> int:
+    def carmichael(self) -> int:
+        """λ(n) = lcm(p - 1, q - 1), período máximo dos expoentes de x₀"""
+        return self._carmichael
+    
+    def state_at(self, i: int) -> int:
         """
-        Gera o próximo bit pseudoaleatório usando BBS com melhor extração
+        Retorna o estado x_i (após i quadraturas) sem percorrer a sequência:
+        x_i = x_0^(2^i mod λ(n)) mod n
+        """
+        if i < 0:
+            raise ValueError("O índice do estado deve ser não negativo")
+        x0 = (self.s * self.s) % self.n
+        return pow(x0, pow(2, i, self.carmichael()), self.n)
+    
+    def seek(self, bit_index: int):
+        """
+        Posiciona o gerador de forma que o próximo bit produzido seja o de
+        índice bit_index da sequência (contado a partir de x₀)
+        """
+        if bit_index < 0:
+            raise ValueError("O índice do bit deve ser não negativo")
+        x0 = (self.s * self.s) % self.n
+        self.current_state, self.pending_bits, self.pending_count = _position_at(
+            self.n, self.carmichael(), x0, self.bits_per_step, bit_index)
+        self.bits_generated = bit_index
+    
+    def max_bits_per_step(self) -> int:
+        """
+        Maior quantidade de bits que pode ser extraída por quadratura
+        mantendo a segurança demonstrável do BBS: floor(log2(log2 n))
+        """
+        return max(1, int(math.log2(math.log2(self.n))))
+    
+    def next_bits(self) -> int:
+        """
+        Executa uma quadratura e retorna os k bits menos significativos do novo estado
         """
         # x_{i+1} = x_i^2 mod n
         self.current_state = pow(self.current_state, 2, self.n)
+        return self.current_state & self.bits_mask
+    
+    def next_bit(self) -> int:
+        """
+        Gera o próximo bit pseudoaleatório usando BBS com melhor extração
+        """
+        # Só faz uma nova quadratura quando os k bits da anterior já foram consumidos
+        if self.pending_count == 0:
+            # Estratégia 1: LSB (padrão BBS), estendida para os k bits menos significativos
+            self.pending_bits = self.next_bits()
+            self.pending_count = self.bits_per_step
         
-        # Para melhor qualidade estatística, podemos usar diferentes estratégias de extração
-        # Estratégia 1: LSB (padrão BBS)
-        bit = self.current_state & 1
+        # Entrega os bits do mais significativo para o menos significativo
+        self.pending_count -= 1
+        bit = (self.pending_bits >> self.pending_count) & 1
         
         # Estratégia 2: Para alguns casos, usar outros bits pode ser melhor
         # Descomente a linha abaixo se quiser testar com bit de paridade
@@ -148,20 +604,39 @@ class BlumBlumShub:
         self.bits_generated += 1
         return bit
     
+    def generate_into(self, buffer) -> int:
+        """
+        Preenche um buffer gravável (bytearray, memoryview, ...) com bytes do BBS
+
+        Núcleo em lote: todas as quadraturas do buffer são feitas em um único laço
+        com variáveis locais, sem chamar next_bit para cada bit. Produz exatamente
+        a mesma sequência que next_bit para os mesmos (p, q, s).
+
+        Returns:
+            Número de bytes escritos
+        """
+        out = memoryview(buffer).cast('B')
+        num_bytes = len(out)
+        if num_bytes == 0:
+            return 0
+        
+        self.current_state, self.pending_bits, self.pending_count = _fill_bytes(
+            out, self.n, self.current_state, self.bits_per_step,
+            self.pending_bits, self.pending_count)
+        
+        self.bits_generated += num_bytes * 8
+        return num_bytes
+    
     def generate_bytes(self, num_bytes: int) -> bytearray:
         """
         Gera uma sequência de bytes usando BBS
         """
-        result = bytearray()
+        result = bytearray(num_bytes)
+        view = memoryview(result)
         
-        for _ in range(num_bytes):
-            byte_val = 0
-            # Gera 8 bits para formar um byte
-            for bit_pos in range(8):
-                bit = self.next_bit()
-                byte_val = (byte_val << 1) | bit
-            
-            result.append(byte_val)
+        # Gera em blocos de CHUNK_SIZE bytes pelo núcleo em lote
+        for start in range(0, num_bytes, self.CHUNK_SIZE):
+            self.generate_into(view[start:start + self.CHUNK_SIZE])
         
         return result
     
@@ -180,67 +655,197 @@ class BlumBlumShub:
         else:
             self.generate_binary_file(filename, num_bits)
     
+    def write_bitstream(self, stream, num_bits: int) -> int:
+        """
+        Escreve num_bits bits como caracteres '0'/'1' em um objeto tipo arquivo
+
+        Os bytes são gerados em blocos pelo núcleo em lote e convertidos para
+        texto pela tabela de 256 entradas, com uma escrita grande por bloco.
+        Aceita tanto streams de texto (ex.: sys.stdout) quanto binários.
+
+        Returns:
+            Número de bits escritos
+        """
+        if isinstance(stream, io.TextIOBase):
+            table, joiner = BITS_TEXT_TABLE, ''
+        else:
+            table, joiner = BITS_ASCII_TABLE, b''
+        
+        full_bytes = num_bits // 8
+        chunk_buffer = memoryview(bytearray(min(self.CHUNK_SIZE, full_bytes)))
+        bytes_done = 0
+        
+        while bytes_done < full_bytes:
+            current_chunk_size = min(self.CHUNK_SIZE, full_bytes - bytes_done)
+            chunk_data = chunk_buffer[:current_chunk_size]
+            self.generate_into(chunk_data)
+            stream.write(joiner.join(map(table.__getitem__, chunk_data)))
+            bytes_done += current_chunk_size
+        
+        # Bits restantes (quando num_bits não é múltiplo de 8)
+        tail = ''.join('1' if self.next_bit() else '0' for _ in range(num_bits % 8))
+        if tail:
+            stream.write(tail if joiner == '' else tail.encode('ascii'))
+        
+        return num_bits
+    
     def generate_text_file(self, filename: str, num_bits: int):
         """
         Gera um arquivo de texto com bits em uma única linha contínua
+
+        Use filename "-" para enviar os bits para a saída padrão.
         """
-        print(f"\nGerando arquivo de texto: {filename}")
-        print(f"Número de bits: {num_bits:,}")
-        print("Gerando dados...")
+        if filename == "-":
+            self.write_bitstream(sys.stdout, num_bits)
+            sys.stdout.flush()
+            return
         
-        with open(filename, 'w') as f:
-            bits_written = 0
-            
-            while bits_written < num_bits:
-                bit = self.next_bit()
-                f.write(str(bit))
-                bits_written += 1
-                
-                # Mostra progresso
-                # if bits_written % 10000 == 0 or bits_written == num_bits:
-                #     progress = (bits_written / num_bits) * 100
-                #     print(f"Progresso: {progress:.1f}% ({bits_written:,}/{num_bits:,} bits)")
+        self._log(f"\nGerando arquivo de texto: {filename}")
+        self._log(f"Número de bits: {num_bits:,}")
+        self._log("Gerando dados...")
         
-        print(f"\nArquivo de texto gerado com sucesso: {filename}")
-        print(f"Total de bits gerados: {self.bits_generated:,}")
-        print(f"Tamanho do arquivo: {os.path.getsize(filename):,} bytes")
+        # Escrita binária em blocos grandes (o conteúdo é ASCII puro)
+        with open(filename, 'wb') as f:
+            self.write_bitstream(f, num_bits)
+        
+        self._log(f"\nArquivo de texto gerado com sucesso: {filename}")
+        self._log(f"Total de bits gerados: {self.bits_generated:,}")
+        self._log(f"Tamanho do arquivo: {os.path.getsize(filename):,} bytes")
     
-    def generate_binary_file(self, filename: str, num_bits: int):
+    def generate_binary_file(self, filename: str, num_bits: int, workers: int = 1, checkpoint: str = None):
         """
         Gera um arquivo binário (método original)
+
+        Com workers > 1 a saída é dividida em segmentos gerados em paralelo por
+        processos que saltam direto para o seu deslocamento; o resultado é
+        idêntico, bit a bit, ao da geração sequencial.
+
+        Com checkpoint, o estado do gerador é salvo periodicamente nesse arquivo.
+        Se a geração for interrompida, chamar novamente com os mesmos argumentos
+        retoma a partir do último checkpoint, completando o arquivo parcial.
         """
         num_bytes = (num_bits + 7) // 8  # Arredonda para cima
         
-        print(f"\nGerando arquivo binário: {filename}")
-        print(f"Número de bits: {num_bits:,} ({num_bytes:,} bytes)")
-        print("Gerando dados...")
+        self._log(f"\nGerando arquivo binário: {filename}")
+        self._log(f"Número de bits: {num_bits:,} ({num_bytes:,} bytes)")
         
-        # Gera os dados em chunks para economizar memória
-        chunk_size = 64 * 1024  # 64KB por vez
         bytes_written = 0
+        mode = 'wb'
+        if checkpoint and os.path.exists(checkpoint) and os.path.exists(filename):
+            bytes_written = self._resume_from_checkpoint(checkpoint)
+            # truncate completaria com zeros um arquivo menor que o checkpoint
+            file_size = os.path.getsize(filename)
+            if file_size < bytes_written:
+                raise ValueError(f"{filename} tem {file_size:,} bytes, menos que os {bytes_written:,} "
+                                 f"registrados no checkpoint; o arquivo parcial foi alterado")
+            mode = 'r+b'
+            self._log(f"Retomando do checkpoint: {bytes_written:,} bytes já gerados")
+        
+        self._log("Gerando dados...")
+        
+        with open(filename, mode) as f:
+            # Descarta o que foi gravado depois do último checkpoint
+            f.truncate(bytes_written)
+            f.seek(bytes_written)
+            
+            if workers > 1:
+                self._write_binary_parallel(f, bytes_written, num_bytes, workers, checkpoint)
+            else:
+                self._write_binary_sequential(f, bytes_written, num_bytes, checkpoint)
         
-        with open(filename, 'wb') as f:
-            while bytes_written < num_bytes:
-                # Calcula quantos bytes gerar neste chunk
-                remaining = num_bytes - bytes_written
-                current_chunk_size = min(chunk_size, remaining)
-                
-                # Gera o chunk
-                chunk_data = self.generate_bytes(current_chunk_size)
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        
+        # Estatísticas finais
+        self._log(f"\nArquivo binário gerado com sucesso: {filename}")
+        self._log(f"Total de bits gerados: {self.bits_generated:,}")
+        self._log(f"Tamanho do arquivo: {os.path.getsize(filename):,} bytes")
+    
+    def _resume_from_checkpoint(self, checkpoint: str) -> int:
+        """
+        Restaura o estado salvo no checkpoint e retorna quantos bytes já foram gravados
+        """
+        state = self._read_state(checkpoint)
+        if (state['p'], state['q'], state['s'], state['bits_per_step']) != \
+                (self.p, self.q, self.s, self.bits_per_step):
+            raise ValueError("O checkpoint pertence a outro gerador (p, q, s ou bits_per_step diferentes)")
+        
+        self._restore_state(state)
+        return state['output_bytes']
+    
+    def _save_checkpoint(self, f, checkpoint: str, bytes_written: int):
+        """Garante que os dados estão no disco antes de registrar o checkpoint"""
+        f.flush()
+        os.fsync(f.fileno())
+        self.save_state(checkpoint, bytes_written)
+    
+    def _write_binary_sequential(self, f, bytes_written: int, num_bytes: int, checkpoint: str):
+        """
+        Gera e grava os bytes em chunks no processo atual
+        """
+        # Gera os dados em chunks para economizar memória
+        chunk_size = self.CHUNK_SIZE
+        
+        # Buffer pré-alocado e reutilizado em todos os chunks
+        chunk_buffer = memoryview(bytearray(chunk_size))
+        
+        while bytes_written < num_bytes:
+            # Calcula quantos bytes gerar neste chunk
+            remaining = num_bytes - bytes_written
+            current_chunk_size = min(chunk_size, remaining)
+            
+            # Gera o chunk diretamente no buffer
+            chunk_data = chunk_buffer[:current_chunk_size]
+            self.generate_into(chunk_data)
+            
+            # Escreve no arquivo
+            f.write(chunk_data)
+            bytes_written += current_chunk_size
+            
+            # Mostra progresso e salva checkpoint a cada 10 chunks
+            progress = (bytes_written / num_bytes) * 100
+            if bytes_written % (chunk_size * 10) == 0 or bytes_written == num_bytes:
+                self._log(f"Progresso: {progress:.1f}% ({bytes_written:,}/{num_bytes:,} bytes)")
+                if checkpoint:
+                    self._save_checkpoint(f, checkpoint, bytes_written)
+    
+    def _write_binary_parallel(self, f, bytes_written: int, num_bytes: int, workers: int, checkpoint: str):
+        """
+        Gera os bytes dividindo-os em segmentos entre processos e grava-os em ordem
+        """
+        remaining = num_bytes - bytes_written
+        if remaining <= 0:
+            return
+        
+        # Segmentos grandes o bastante para amortizar o salto inicial de cada processo
+        segment_size = max(self.CHUNK_SIZE, min(64 * self.CHUNK_SIZE, -(-remaining // workers)))
+        starts = range(0, remaining, segment_size)
+        sizes = [min(segment_size, remaining - start) for start in starts]
+        
+        x0 = (self.s * self.s) % self.n
+        base_bit = self.bits_generated
+        lam = self.carmichael()
+        k = self.bits_per_step
+        count = len(sizes)
+        
+        generated = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map preserva a ordem dos segmentos
+            segments = executor.map(_generate_segment,
+                                    [self.n] * count, [lam] * count, [x0] * count, [k] * count,
+                                    [base_bit + start * 8 for start in starts], sizes)
+            for segment in segments:
+                f.write(segment)
+                generated += len(segment)
+                bytes_written += len(segment)
                 
-                # Escreve no arquivo
-                f.write(chunk_data)
-                bytes_written += len(chunk_data)
+                # Continua a sequência a partir do fim do segmento, como na geração sequencial
+                self.seek(base_bit + generated * 8)
                 
-                # Mostra progresso
                 progress = (bytes_written / num_bytes) * 100
-                if bytes_written % (chunk_size * 10) == 0 or bytes_written == num_bytes:
-                    print(f"Progresso: {progress:.1f}% ({bytes_written:,}/{num_bytes:,} bytes)")
-        
-        # Estatísticas finais
-        print(f"\nArquivo binário gerado com sucesso: {filename}")
-        print(f"Total de bits gerados: {self.bits_generated:,}")
-        print(f"Tamanho do arquivo: {os.path.getsize(filename):,} bytes")
+                self._log(f"Progresso: {progress:.1f}% ({bytes_written:,}/{num_bytes:,} bytes)")
+                if checkpoint:
+                    self._save_checkpoint(f, checkpoint, bytes_written)
     
     def analyze_first_bytes(self, num_bytes: int = 16):
         """Analisa os primeiros bytes gerados para verificação"""
@@ -249,10 +854,12 @@ class BlumBlumShub:
         # Salva o estado atual
         saved_state = self.current_state
         saved_bits_count = self.bits_generated
+        saved_pending = (self.pending_bits, self.pending_count)
         
         # Reinicia para análise
         self.current_state = (self.s * self.s) % self.n
         self.bits_generated = 0
+        self.pending_bits, self.pending_count = 0, 0
         
         for i in range(num_bytes):
             byte_val = 0
@@ -269,13 +876,121 @@ class BlumBlumShub:
         # Restaura o estado
         self.current_state = saved_state
         self.bits_generated = saved_bits_count
+        self.pending_bits, self.pending_count = saved_pending
+
+
+class BBSStream(io.RawIOBase):
+    """
+    Fonte de bytes tipo arquivo (como os.urandom) alimentada por um BlumBlumShub
+
+    readinto preenche diretamente o buffer do chamador, sem bytearray temporário.
+    A posição (em bytes) pode ser alterada com seek graças ao salto do BBS.
+    """
+
+    def __init__(self, bbs: BlumBlumShub):
+        super().__init__()
+        self.bbs = bbs
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return self.bbs.generate_into(buffer)
+
+    def readall(self):
+        raise io.UnsupportedOperation("BBSStream é infinito; use read(n) ou readinto")
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        """
+        Posição em bytes; só existe quando o gerador está alinhado a bytes
+        (bits consumidos direto do BBS, como em next_bit, podem desalinhá-lo)
+        """
+        bits_generated = self.bbs.bits_generated
+        if bits_generated % 8:
+            raise ValueError(f"Posição do BBS não alinhada a bytes: {bits_generated} bits gerados")
+        return bits_generated // 8
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.tell()
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("BBSStream não tem fim")
+        self.bbs.seek(offset * 8)
+        return offset
+
+
+class BBSRandom(random.Random):
+    """
+    random.Random alimentado por um BlumBlumShub (getrandbits, randbytes,
+    random e todos os métodos derivados, como randint e choice)
+    """
+
+    def __init__(self, bbs: BlumBlumShub = None):
+        self.bbs = bbs if bbs is not None else BlumBlumShub()
+        super().__init__()
+
+    def seed(self, *args, **kwargs):
+        """A sequência é definida pelo gerador BBS; não há seed a aplicar"""
+        return None
+
+    def getrandbits(self, k: int) -> int:
+        if k < 0:
+            raise ValueError("O número de bits deve ser não negativo")
+        if k == 0:
+            return 0
+        num_bytes = (k + 7) // 8
+        buffer = bytearray(num_bytes)
+        self.bbs.generate_into(buffer)
+        return int.from_bytes(buffer, 'big') >> (num_bytes * 8 - k)
+
+    def random(self) -> float:
+        return self.getrandbits(53) * (2.0 ** -53)
+
+    def randbytes(self, n: int) -> bytes:
+        buffer = bytearray(n)
+        self.bbs.generate_into(buffer)
+        return bytes(buffer)
+
+    def getstate(self):
+        """
+        Estado com os campos de save_state: (p, q, s, bits_per_step,
+        current_state, pending_bits, pending_count, bits_generated)
+        """
+        bbs = self.bbs
+        pending_bits = bbs.pending_bits & ((1 << bbs.pending_count) - 1)
+        return (bbs.p, bbs.q, bbs.s, bbs.bits_per_step, bbs.current_state,
+                pending_bits, bbs.pending_count, bbs.bits_generated)
+
+    def setstate(self, state):
+        """
+        Restaura um estado de getstate; se p, q, s ou bits_per_step forem
+        outros, recria o gerador com from_params
+        """
+        p, q, s, bits_per_step, current_state, pending_bits, pending_count, bits_generated = state
+        bbs = self.bbs
+        if (p, q, s, bits_per_step) != (bbs.p, bbs.q, bbs.s, bbs.bits_per_step):
+            self.bbs = BlumBlumShub.from_params(p, q, s, bits_per_step)
+        self.bbs._restore_state({
+            'current_state': current_state, 'pending_bits': pending_bits,
+            'pending_count': pending_count, 'bits_generated': bits_generated,
+        })
+
+    def __reduce__(self):
+        # copy e pickle recebem um gerador próprio (sem busca de primos) na mesma posição
+        bbs = self.bbs
+        return (self.__class__, (BlumBlumShub.from_params(bbs.p, bbs.q, bbs.s, bbs.bits_per_step),),
+                self.getstate())
+
 
 def main():
     """Função principal que demonstra o uso do BBS"""
     
     # Cria o gerador BBS
     print("Inicializando Gerador Blum Blum Shub...")
-    bbs = BlumBlumShub(min_prime=10000)
+    bbs = BlumBlumShub(min_prime=10000, verbose=True)
     
     bbs.analyze_first_bytes(4)
     
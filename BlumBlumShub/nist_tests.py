@@ -0,0 +1,507 @@
+"""
+Suíte local de testes estatísticos do NIST SP 800-22 para a saída do BBS
+
+Executa os testes principais (frequência, frequência em blocos, runs, maior
+run em blocos, somas cumulativas, entropia aproximada, serial e universal de
+Maurer) processando os bits em blocos, com contagens vetorizadas em NumPy.
+A memória usada depende apenas do tamanho do bloco, não do total de bits,
+então 10^8 bits podem ser testados sem gerar um arquivo de texto.
+
+Uso:
+    python nist_tests.py [num_bits] [--bits N] [--input arquivo] [--bits-per-step k]
+"""
+
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+# Nível de significância usado pelo NIST
+ALPHA = 0.01
+
+# Bytes processados por bloco (8 Mi bits)
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+
+# Maior run em blocos: (n mínimo, M, menor categoria, probabilidades das categorias)
+LONGEST_RUN_PARAMETERS = (
+    (750000, 10000, 10, (0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727)),
+    (6272, 128, 4, (0.1174, 0.2430, 0.2493, 0.1752, 0.1027, 0.1124)),
+    (128, 8, 1, (0.2148, 0.3672, 0.2305, 0.1875)),
+)
+
+# Universal de Maurer: (n mínimo, L, valor esperado, variância)
+UNIVERSAL_PARAMETERS = (
+    (1059061760, 16, 15.167379, 3.421),
+    (496435200, 15, 14.167488, 3.419),
+    (231669760, 14, 13.167693, 3.416),
+    (107560960, 13, 12.168070, 3.410),
+    (49643520, 12, 11.168765, 3.401),
+    (22753280, 11, 10.170032, 3.384),
+    (10342400, 10, 9.1723243, 3.356),
+    (4654080, 9, 8.1764248, 3.311),
+    (2068480, 8, 7.1836656, 3.238),
+    (904960, 7, 6.1962507, 3.125),
+    (387840, 6, 5.2177052, 2.954),
+)
+
+
+def igamc(a: float, x: float) -> float:
+    """Função gama incompleta superior regularizada Q(a, x)"""
+    if x <= 0:
+        return 1.0
+    log_prefactor = -x + a * math.log(x) - math.lgamma(a)
+
+    if x < a + 1:
+        # Série para P(a, x)
+        term = total = 1.0 / a
+        ap = a
+        while abs(term) > abs(total) * 1e-15:
+            ap += 1
+            term *= x / ap
+            total += term
+        return max(0.0, 1.0 - total * math.exp(log_prefactor))
+
+    # Fração continuada (método de Lentz) para Q(a, x)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    i = 1
+    while True:
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+        i += 1
+    return math.exp(log_prefactor) * h
+
+
+def _normal_cdf(x: float) -> float:
+    return 0.5 * math.erfc(-x / math.sqrt(2))
+
+
+def _c_div(a: float, b: float) -> int:
+    """Divisão com truncamento em direção a zero (como no código de referência em C)"""
+    return int(a / b)
+
+
+def _result(p_values, **details) -> dict:
+    """Monta o resultado de um teste em formato serializável"""
+    if not isinstance(p_values, (list, tuple)):
+        p_values = [p_values]
+    p_values = [float(p) for p in p_values]
+    return {
+        'applicable': True,
+        'p_value': min(p_values),
+        'p_values': p_values,
+        'passed': all(p >= ALPHA for p in p_values),
+        **details,
+    }
+
+
+def _not_applicable(reason: str) -> dict:
+    return {'applicable': False, 'p_value': None, 'p_values': [], 'passed': None, 'reason': reason}
+
+
+class _BlockSplitter:
+    """Agrupa bits em blocos de tamanho fixo, guardando a sobra entre chamadas"""
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self.remainder = np.empty(0, dtype=np.uint8)
+
+    def feed(self, bits: np.ndarray) -> np.ndarray:
+        """Retorna uma matriz (blocos completos x block_size)"""
+        if len(self.remainder):
+            bits = np.concatenate((self.remainder, bits))
+        full = len(bits) // self.block_size * self.block_size
+        self.remainder = bits[full:].copy()
+        return bits[:full].reshape(-1, self.block_size)
+
+
+class StreamingNistSuite:
+    """
+    Acumula as estatísticas dos testes do NIST SP 800-22 bloco a bloco
+
+    num_bits é o tamanho total esperado da sequência; ele define os parâmetros
+    que dependem de n (M do teste de maior run e L do universal de Maurer).
+    """
+
+    def __init__(self, num_bits: int, block_frequency_m: int = 128,
+                 approximate_entropy_m: int = 10, serial_m: int = 16):
+        self.num_bits = num_bits
+        self.block_frequency_m = block_frequency_m
+        self.approximate_entropy_m = approximate_entropy_m
+        self.serial_m = serial_m
+
+        self.n = 0
+        self.ones = 0
+
+        # Frequência em blocos
+        self._block_frequency_splitter = _BlockSplitter(block_frequency_m)
+        self._block_frequency_blocks = 0
+        self._block_frequency_sum = 0.0
+
+        # Runs
+        self._transitions = 0
+        self._last_bit = None
+
+        # Somas cumulativas (S_0 = 0 incluído)
+        self._partial_sum = 0
+        self._max_sum = 0
+        self._min_sum = 0
+
+        # Maior run em blocos
+        self._longest_run = None
+        for min_n, m, low, probabilities in LONGEST_RUN_PARAMETERS:
+            if num_bits >= min_n:
+                self._longest_run = (m, low, probabilities)
+                self._longest_run_splitter = _BlockSplitter(m)
+                self._longest_run_counts = np.zeros(len(probabilities), dtype=np.int64)
+                break
+
+        # Padrões sobrepostos (entropia aproximada e serial), com contagem circular
+        self._pattern_width = max(serial_m, approximate_entropy_m + 1)
+        self._pattern_counts = np.zeros(1 << self._pattern_width, dtype=np.int64)
+        self._pattern_head = np.empty(0, dtype=np.uint8)
+        self._pattern_carry = np.empty(0, dtype=np.uint8)
+
+        # Universal de Maurer
+        self._universal = None
+        for min_n, length, expected, variance in UNIVERSAL_PARAMETERS:
+            if num_bits >= min_n:
+                self._universal = (length, expected, variance)
+                self._universal_q = 10 * (1 << length)
+                self._universal_k = num_bits // length - self._universal_q
+                self._universal_splitter = _BlockSplitter(length)
+                self._universal_weights = 1 << np.arange(length - 1, -1, -1, dtype=np.int64)
+                self._universal_last_seen = np.zeros(1 << length, dtype=np.int64)
+                self._universal_blocks = 0
+                self._universal_sum = 0.0
+                break
+
+    def update(self, data) -> None:
+        """Processa bytes (bytes, bytearray, memoryview), bit mais significativo primeiro"""
+        self.update_bits(np.unpackbits(np.frombuffer(data, dtype=np.uint8)))
+
+    def update_bits(self, bits: np.ndarray) -> None:
+        """Processa um vetor de bits 0/1 (uint8)"""
+        if len(bits) == 0:
+            return
+        bits = np.asarray(bits, dtype=np.uint8)
+
+        self.n += len(bits)
+        self.ones += int(np.count_nonzero(bits))
+
+        self._update_block_frequency(bits)
+        self._update_runs(bits)
+        self._update_cumulative_sums(bits)
+        if self._longest_run is not None:
+            self._update_longest_run(bits)
+        self._update_patterns(bits)
+        if self._universal is not None:
+            self._update_universal(bits)
+
+    def _update_block_frequency(self, bits):
+        blocks = self._block_frequency_splitter.feed(bits)
+        if len(blocks):
+            proportions = blocks.sum(axis=1, dtype=np.int64) / self.block_frequency_m
+            self._block_frequency_sum += float(np.sum((proportions - 0.5) ** 2))
+            self._block_frequency_blocks += len(blocks)
+
+    def _update_runs(self, bits):
+        self._transitions += int(np.count_nonzero(bits[1:] != bits[:-1]))
+        if self._last_bit is not None and bits[0] != self._last_bit:
+            self._transitions += 1
+        self._last_bit = bits[-1]
+
+    def _update_cumulative_sums(self, bits):
+        sums = np.cumsum(bits.astype(np.int64) * 2 - 1) + self._partial_sum
+        self._max_sum = max(self._max_sum, int(sums.max()))
+        self._min_sum = min(self._min_sum, int(sums.min()))
+        self._partial_sum = int(sums[-1])
+
+    def _update_longest_run(self, bits):
+        m, low, probabilities = self._longest_run
+        blocks = self._longest_run_splitter.feed(bits)
+        if len(blocks) == 0:
+            return
+
+        # min(maior run, limite) por bloco: a cada passo, x[i] indica um run de r+1 uns a partir de i
+        cap = low + len(probabilities) - 1
+        x = blocks.astype(bool)
+        longest = np.zeros(len(blocks), dtype=np.int64)
+        for _ in range(cap):
+            alive = x.any(axis=1)
+            if not alive.any():
+                break
+            longest += alive
+            x = x[:, :-1] & x[:, 1:]
+
+        categories = np.clip(longest - low, 0, len(probabilities) - 1)
+        self._longest_run_counts += np.bincount(categories, minlength=len(probabilities))
+
+    def _count_windows(self, bits):
+        """Conta todas as janelas de _pattern_width bits contidas em bits"""
+        width = self._pattern_width
+        count = len(bits) - width + 1
+        if count <= 0:
+            return
+        index = np.zeros(count, dtype=np.int64)
+        for j in range(width):
+            index <<= 1
+            index |= bits[j:j + count]
+        self._pattern_counts += np.bincount(index, minlength=len(self._pattern_counts))
+
+    def _update_patterns(self, bits):
+        width = self._pattern_width
+
+        # Guarda os primeiros bits da sequência para a contagem circular no final
+        if len(self._pattern_head) < width - 1:
+            self._pattern_head = np.concatenate(
+                (self._pattern_head, bits[:width - 1 - len(self._pattern_head)]))
+
+        extended = np.concatenate((self._pattern_carry, bits))
+        self._count_windows(extended)
+        self._pattern_carry = extended[-(width - 1):].copy() if width > 1 else extended[:0]
+
+    def _update_universal(self, bits):
+        length, _, _ = self._universal
+        blocks = self._universal_splitter.feed(bits)
+
+        # Somente os Q + K primeiros blocos fazem parte do teste
+        limit = self._universal_q + self._universal_k - self._universal_blocks
+        blocks = blocks[:max(0, limit)]
+        if len(blocks) == 0:
+            return
+
+        values = blocks.astype(np.int64) @ self._universal_weights
+        indices = np.arange(self._universal_blocks + 1, self._universal_blocks + len(blocks) + 1)
+        self._universal_blocks += len(blocks)
+
+        # Agrupa as ocorrências de cada padrão: a anterior de cada bloco é a vizinha
+        # no grupo, ou a última vista em blocos anteriores para o primeiro do grupo
+        order = np.argsort(values, kind='stable')
+        sorted_values = values[order]
+        sorted_indices = indices[order]
+        previous = np.empty_like(sorted_indices)
+        previous[1:] = sorted_indices[:-1]
+        group_start = np.ones(len(sorted_values), dtype=bool)
+        group_start[1:] = sorted_values[1:] != sorted_values[:-1]
+        previous[group_start] = self._universal_last_seen[sorted_values[group_start]]
+
+        group_end = np.ones(len(sorted_values), dtype=bool)
+        group_end[:-1] = group_start[1:]
+        self._universal_last_seen[sorted_values[group_end]] = sorted_indices[group_end]
+
+        in_test = sorted_indices > self._universal_q
+        self._universal_sum += float(np.log2(sorted_indices[in_test] - previous[in_test]).sum())
+
+    def finalize(self) -> dict:
+        """Calcula os p-valores de todos os testes"""
+        if self.n == 0:
+            raise ValueError("Nenhum bit foi processado")
+
+        return {
+            'n': self.n,
+            'alpha': ALPHA,
+            'frequency': self._frequency(),
+            'block_frequency': self._block_frequency(),
+            'runs': self._runs(),
+            'longest_run': self._longest_run_result(),
+            'cumulative_sums': self._cumulative_sums(),
+            'approximate_entropy': self._approximate_entropy(),
+            'serial': self._serial(),
+            'universal': self._universal_result(),
+        }
+
+    def _frequency(self):
+        s_obs = abs(2 * self.ones - self.n) / math.sqrt(self.n)
+        return _result(math.erfc(s_obs / math.sqrt(2)))
+
+    def _block_frequency(self):
+        blocks = self._block_frequency_blocks
+        if blocks == 0:
+            return _not_applicable(f"menos de {self.block_frequency_m} bits")
+        chi_squared = 4 * self.block_frequency_m * self._block_frequency_sum
+        return _result(igamc(blocks / 2, chi_squared / 2), m=self.block_frequency_m, chi_squared=chi_squared)
+
+    def _runs(self):
+        pi = self.ones / self.n
+        if abs(pi - 0.5) >= 2 / math.sqrt(self.n):
+            return _result(0.0, reason="teste de frequência não satisfeito")
+        v_obs = self._transitions + 1
+        p = math.erfc(abs(v_obs - 2 * self.n * pi * (1 - pi)) /
+                      (2 * math.sqrt(2 * self.n) * pi * (1 - pi)))
+        return _result(p, runs=v_obs)
+
+    def _longest_run_result(self):
+        if self._longest_run is None:
+            return _not_applicable("menos de 128 bits")
+        m, _, probabilities = self._longest_run
+        blocks = int(self._longest_run_counts.sum())
+        chi_squared = sum((count - blocks * pi) ** 2 / (blocks * pi)
+                          for count, pi in zip(self._longest_run_counts.tolist(), probabilities))
+        k = len(probabilities) - 1
+        return _result(igamc(k / 2, chi_squared / 2), m=m, chi_squared=chi_squared,
+                       counts=self._longest_run_counts.tolist())
+
+    def _cumulative_sums(self):
+        n = self.n
+        forward = max(self._max_sum, -self._min_sum)
+        backward = max(self._partial_sum - self._min_sum, self._max_sum - self._partial_sum)
+
+        def p_value(z):
+            sqrt_n = math.sqrt(n)
+            total = 1.0
+            for k in range(_c_div(_c_div(-n, z) + 1, 4), _c_div(_c_div(n, z) - 1, 4) + 1):
+                total -= _normal_cdf((4 * k + 1) * z / sqrt_n) - _normal_cdf((4 * k - 1) * z / sqrt_n)
+            for k in range(_c_div(_c_div(-n, z) - 3, 4), _c_div(_c_div(n, z) - 1, 4) + 1):
+                total += _normal_cdf((4 * k + 3) * z / sqrt_n) - _normal_cdf((4 * k + 1) * z / sqrt_n)
+            return total
+
+        return _result([p_value(forward), p_value(backward)], z_forward=forward, z_backward=backward)
+
+    def _circular_counts(self, m: int) -> np.ndarray:
+        """Contagens circulares dos padrões de m bits, obtidas das janelas maiores"""
+        if m <= 0:
+            return np.array([self.n], dtype=np.int64)
+        return self._final_pattern_counts.reshape(1 << m, -1).sum(axis=1)
+
+    def _finish_patterns(self):
+        if not hasattr(self, '_final_pattern_counts'):
+            # Janelas que dão a volta: fim da sequência seguido do início
+            saved = self._pattern_counts.copy()
+            self._count_windows(np.concatenate((self._pattern_carry, self._pattern_head)))
+            self._final_pattern_counts = self._pattern_counts
+            self._pattern_counts = saved
+
+    def _approximate_entropy(self):
+        if self.n < self._pattern_width:
+            return _not_applicable("sequência menor que o tamanho dos padrões")
+        self._finish_patterns()
+        m = self.approximate_entropy_m
+
+        def phi(counts):
+            counts = counts[counts > 0] / self.n
+            return float(np.sum(counts * np.log(counts)))
+
+        ap_en = phi(self._circular_counts(m)) - phi(self._circular_counts(m + 1))
+        chi_squared = 2 * self.n * (math.log(2) - ap_en)
+        return _result(igamc(2 ** (m - 1), chi_squared / 2), m=m, ap_en=ap_en, chi_squared=chi_squared)
+
+    def _serial(self):
+        if self.n < self._pattern_width:
+            return _not_applicable("sequência menor que o tamanho dos padrões")
+        self._finish_patterns()
+        m = self.serial_m
+
+        def psi_squared(width):
+            if width <= 0:
+                return 0.0
+            counts = self._circular_counts(width).astype(np.float64)
+            return float((1 << width) / self.n * np.sum(counts ** 2) - self.n)
+
+        psi_m, psi_m1, psi_m2 = psi_squared(m), psi_squared(m - 1), psi_squared(m - 2)
+        delta1 = psi_m - psi_m1
+        delta2 = psi_m - 2 * psi_m1 + psi_m2
+        return _result([igamc(2 ** (m - 2), delta1 / 2), igamc(2 ** (m - 3), delta2 / 2)],
+                       m=m, delta1=delta1, delta2=delta2)
+
+    def _universal_result(self):
+        if self._universal is None:
+            return _not_applicable("são necessários pelo menos 387840 bits")
+        length, expected, variance = self._universal
+        k = self._universal_blocks - self._universal_q
+        if k <= 0:
+            return _not_applicable("bits insuficientes para o segmento de teste")
+
+        fn = self._universal_sum / k
+        c = 0.7 - 0.8 / length + (4 + 32 / length) * k ** (-3 / length) / 15
+        sigma = c * math.sqrt(variance / k)
+        p = math.erfc(abs(fn - expected) / (math.sqrt(2) * sigma))
+        return _result(p, l=length, q=self._universal_q, k=k, fn=fn)
+
+
+def run_tests(source, num_bits: int, chunk_bytes: int = DEFAULT_CHUNK_BYTES, **parameters) -> dict:
+    """
+    Executa a suíte sobre num_bits bits de uma fonte, em blocos
+
+    Args:
+        source: Um BlumBlumShub (consumido via generate_bytes) ou um iterável de
+            blocos de bytes
+        num_bits: Número de bits a testar (arredondado para baixo para bytes inteiros
+            quando a fonte é um gerador)
+        chunk_bytes: Tamanho de cada bloco processado
+        parameters: Repassados para StreamingNistSuite (block_frequency_m, ...)
+    """
+    suite = StreamingNistSuite(num_bits, **parameters)
+
+    if hasattr(source, 'generate_bytes'):
+        remaining = num_bits // 8
+        while remaining > 0:
+            size = min(chunk_bytes, remaining)
+            suite.update(source.generate_bytes(size))
+            remaining -= size
+    else:
+        for chunk in source:
+            suite.update(chunk)
+
+    return suite.finalize()
+
+
+def read_bit_file(filename: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+    """
+    Lê um arquivo em blocos: texto com caracteres '0'/'1' (.txt) ou binário
+    Retorna um gerador de vetores de bits
+    """
+    text = filename.endswith('.txt')
+    with open(filename, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            data = np.frombuffer(chunk, dtype=np.uint8)
+            if text:
+                yield (data[(data == ord('0')) | (data == ord('1'))] - ord('0')).astype(np.uint8)
+            else:
+                yield np.unpackbits(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Testes NIST SP 800-22 sobre a saída do BBS")
+    parser.add_argument('num_bits', type=int, nargs='?', default=1000000,
+                        help="Número de bits a gerar e testar")
+    parser.add_argument('--input', help="Testa um arquivo (.txt com '0'/'1' ou binário) em vez de gerar bits")
+    parser.add_argument('--bits', type=int, help="Tamanho em bits de p e q do gerador")
+    parser.add_argument('--bits-per-step', type=int, default=1, help="Bits extraídos por quadratura")
+    args = parser.parse_args()
+
+    if args.input:
+        # Conta os bits antes, pois alguns parâmetros dependem de n
+        num_bits = sum(len(bits) for bits in read_bit_file(args.input))
+        suite = StreamingNistSuite(num_bits)
+        for bits in read_bit_file(args.input):
+            suite.update_bits(bits)
+        results = suite.finalize()
+    else:
+        from BlumBlumShub import BlumBlumShub
+        bbs = BlumBlumShub(bits=args.bits, bits_per_step=args.bits_per_step)
+        results = run_tests(bbs, args.num_bits)
+
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
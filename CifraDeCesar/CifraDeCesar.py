@@ -1,46 +1,31 @@
+from cesar import decriptar, encriptar
+
+
 def cifra_cesar_encriptar(texto, chave):
     """
     Encripta um texto utilizando a Cifra de César com a chave especificada.
     
     Args:
-        texto (str): O texto a ser encriptado
+        texto (str | bytes): O texto a ser encriptado
         chave (int): O valor de deslocamento (1 a N)
     
     Returns:
-        str: O texto encriptado
+        str | bytes: O texto encriptado
     """
-    # Garantir que é um número positivo
-    chave = abs(chave)
-    
-    resultado = ""
-    
-    for caractere in texto:
-        if caractere.isalpha():
-            # Determinar o código ASCII base (65 para maiúsculas, 97 para minúsculas)
-            ascii_base = 65 if caractere.isupper() else 97
-            indice = ord(caractere) - ascii_base
-            novo_indice = (indice + chave) % 26
-            novo_caractere = chr(novo_indice + ascii_base)
-            
-            resultado += novo_caractere
-        else:
-            resultado += caractere
-    
-    return resultado
+    return encriptar(texto, chave)
 
 def cifra_cesar_decriptar(texto_cifrado, chave):
     """
     Decripta um texto que foi encriptado com a Cifra de César usando a chave especificada.
     
     Args:
-        texto_cifrado (str): O texto cifrado a ser decriptado
+        texto_cifrado (str | bytes): O texto cifrado a ser decriptado
         chave (int): O valor de deslocamento usado na encriptação
     
     Returns:
-        str: O texto original decriptado
+        str | bytes: O texto original decriptado
     """
-    chave_inversa = 26 - (chave % 26)
-    return cifra_cesar_encriptar(texto_cifrado, chave_inversa)
+    return decriptar(texto_cifrado, chave)
 
 
 def mostrar_menu():
@@ -0,0 +1,86 @@
+"""
+Núcleo da Cifra de César compartilhado pelos scripts desta pasta.
+As 26 tabelas de tradução (para str e para bytes) são calculadas uma única
+vez, ao importar o módulo, e cada encriptação/decriptação é uma única
+chamada a translate.
+"""
+
+import string
+
+TAMANHO_ALFABETO = 26
+
+
+def _alfabeto_deslocado(alfabeto, deslocamento):
+    return alfabeto[deslocamento:] + alfabeto[:deslocamento]
+
+
+def _gerar_tabelas():
+    """
+    Gera as tabelas de tradução para cada deslocamento de 0 a 25.
+    Apenas as letras A-Z e a-z são deslocadas; os demais caracteres
+    (incluindo letras acentuadas) são mantidos.
+
+    Returns:
+        tuple: (tabelas para str, tabelas para bytes)
+    """
+    minusculas = string.ascii_lowercase
+    maiusculas = string.ascii_uppercase
+    origem = minusculas + maiusculas
+
+    tabelas_str = []
+    tabelas_bytes = []
+    for deslocamento in range(TAMANHO_ALFABETO):
+        destino = _alfabeto_deslocado(minusculas, deslocamento) + _alfabeto_deslocado(maiusculas, deslocamento)
+        tabelas_str.append(str.maketrans(origem, destino))
+        tabelas_bytes.append(bytes.maketrans(origem.encode("ascii"), destino.encode("ascii")))
+
+    return tuple(tabelas_str), tuple(tabelas_bytes)
+
+
+# TABELAS_STR[k] e TABELAS_BYTES[k] deslocam as letras k posições para frente
+TABELAS_STR, TABELAS_BYTES = _gerar_tabelas()
+
+
+def deslocar(texto, deslocamento):
+    """
+    Desloca as letras do texto no alfabeto com uma única chamada a translate.
+
+    Args:
+        texto (str | bytes | bytearray): Texto a ser deslocado
+        deslocamento (int): Posições para frente (negativo = para trás)
+
+    Returns:
+        str | bytes | bytearray: Texto deslocado, do mesmo tipo da entrada
+    """
+    deslocamento %= TAMANHO_ALFABETO
+    if isinstance(texto, str):
+        return texto.translate(TABELAS_STR[deslocamento])
+    return texto.translate(TABELAS_BYTES[deslocamento])
+
+
+def encriptar(texto, chave):
+    """
+    Encripta um texto com a Cifra de César.
+
+    Args:
+        texto (str | bytes | bytearray): Texto a ser encriptado
+        chave (int): Valor de deslocamento (o sinal é ignorado)
+
+    Returns:
+        str | bytes | bytearray: Texto encriptado
+    """
+    return deslocar(texto, abs(chave))
+
+
+def decriptar(texto_cifrado, chave):
+    """
+    Decripta um texto encriptado com a Cifra de César.
+
+    Args:
+        texto_cifrado (str | bytes | bytearray): Texto cifrado
+        chave (int): Valor de deslocamento usado na encriptação
+
+    Returns:
+        str | bytes | bytearray: Texto decriptado
+    """
+    return deslocar(texto_cifrado, -chave)
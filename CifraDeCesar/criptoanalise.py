@@ -3,9 +3,16 @@ Criptoanálise da Cifra de César usando Análise de Frequência de Letras
 Quebra cifras de César sem conhecer a chave, baseado nas frequências das letras em português.
 """
 
-import collections
+import re
 import string
 
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele, a contagem usa bytes.count
+    np = None
+
+from cesar import decriptar, encriptar
+
 # Frequências das letras em português brasileiro (%)
 FREQUENCIA_PORTUGUES = {
     'a': 14.63, 'e': 12.57, 'o': 10.73, 's': 7.81, 'r': 6.53,
@@ -16,6 +23,26 @@ FREQUENCIA_PORTUGUES = {
     'y': 0.01
 }
 
+# Frequências esperadas na ordem do alfabeto (a-z)
+FREQUENCIAS_ESPERADAS = [FREQUENCIA_PORTUGUES[letra] for letra in string.ascii_lowercase]
+
+# Quantidade de melhores resultados mostrados (e decriptados) por padrão
+TOP_RESULTADOS = 5
+
+# Tamanhos das amostras (em letras) da recuperação de chave amostrada
+AMOSTRAS_PADRAO = (1000, 4000, 16000)
+
+# Diferença mínima de chi-quadrado, em contagens de letras, entre a melhor e a
+# segunda melhor chave para aceitar o resultado de uma amostra (textos reais em
+# português passam de 1000 com cerca de 250 letras)
+MARGEM_MINIMA = 1000.0
+
+# Trechos só com caracteres ASCII (removidos para contar as letras acentuadas)
+_TRECHOS_ASCII = re.compile(r'[\x00-\x7f]+')
+
+_MINUSCULAS = string.ascii_lowercase.encode('ascii')
+_PARA_MINUSCULAS = bytes.maketrans(string.ascii_uppercase.encode('ascii'), _MINUSCULAS)
+
 def cifra_cesar_decriptar(texto_cifrado, chave):
     """
     Decripta um texto cifrado com Cifra de César.
@@ -27,20 +54,35 @@ def cifra_cesar_decriptar(texto_cifrado, chave):
     Returns:
         str: Texto decriptado
     """
-    chave = chave % 26
-    resultado = ""
-    
-    for caractere in texto_cifrado:
-        if caractere.isalpha():
-            ascii_base = 65 if caractere.isupper() else 97
-            indice = ord(caractere) - ascii_base
-            novo_indice = (indice - chave) % 26
-            novo_caractere = chr(novo_indice + ascii_base)
-            resultado += novo_caractere
-        else:
-            resultado += caractere
+    return decriptar(texto_cifrado, chave)
+
+def contar_letras(texto):
+    """
+    Conta as letras do texto em uma única passagem, sem distinguir maiúsculas.
     
-    return resultado
+    Args:
+        texto (str | bytes): Texto para análise
+    
+    Returns:
+        tuple: (contagens das letras de 'a' a 'z', total de caracteres alfabéticos)
+    """
+    if isinstance(texto, str):
+        dados = texto.encode('utf-8')
+        # Letras fora do ASCII (como as acentuadas) também entram no total
+        outras = 0 if texto.isascii() else sum(map(str.isalpha, _TRECHOS_ASCII.sub('', texto)))
+    else:
+        dados = texto
+        outras = 0
+    
+    # Em UTF-8, os bytes de 'A'-'Z' e 'a'-'z' só aparecem nas próprias letras ASCII
+    if np is not None:
+        histograma = np.bincount(np.frombuffer(dados, dtype=np.uint8), minlength=256)
+        contagens = [int(histograma[letra]) + int(histograma[letra - 32]) for letra in _MINUSCULAS]
+    else:
+        dados = dados.translate(_PARA_MINUSCULAS)
+        contagens = [dados.count(letra) for letra in _MINUSCULAS]
+    
+    return contagens, sum(contagens) + outras
 
 def calcular_frequencia_texto(texto):
     """
@@ -52,23 +94,13 @@ def calcular_frequencia_texto(texto):
     Returns:
         dict: Frequências percentuais das letras
     """
-    # Remove caracteres não-alfabéticos e converte para minúsculas
-    texto_limpo = ''.join(c.lower() for c in texto if c.isalpha())
+    contagens, total_letras = contar_letras(texto)
     
-    if len(texto_limpo) == 0:
+    if total_letras == 0:
         return {letra: 0 for letra in string.ascii_lowercase}
     
-    # Conta ocorrências
-    contador = collections.Counter(texto_limpo)
-    total_letras = len(texto_limpo)
-    
     # Calcula frequências percentuais
-    frequencias = {}
-    for letra in string.ascii_lowercase:
-        count = contador.get(letra, 0)
-        frequencias[letra] = (count / total_letras) * 100
-    
-    return frequencias
+    return {letra: (count / total_letras) * 100 for letra, count in zip(string.ascii_lowercase, contagens)}
 
 def calcular_chi_quadrado(freq_observada, freq_esperada):
     """
@@ -93,53 +125,157 @@ def calcular_chi_quadrado(freq_observada, freq_esperada):
     
     return chi_quadrado
 
-def criptoanalise_cesar(texto_cifrado, mostrar_processo=True):
+def pontuar_chaves(contagens, total_letras):
+    """
+    Calcula o chi-quadrado de todas as 26 chaves a partir das contagens de
+    letras do texto cifrado, sem decriptá-lo: decriptar com a chave k apenas
+    rotaciona o histograma (a letra p do texto decriptado aparece tantas vezes
+    quanto a letra (p + k) % 26 do texto cifrado).
+    
+    Args:
+        contagens (list): Contagens das letras de 'a' a 'z' no texto cifrado
+        total_letras (int): Total de caracteres alfabéticos do texto
+    
+    Returns:
+        list: Valor chi-quadrado de cada chave (índice = chave, de 0 a 25)
+    """
+    pontuacoes = []
+    
+    for chave in range(26):
+        chi_quadrado = 0
+        for letra, esperada in enumerate(FREQUENCIAS_ESPERADAS):
+            observada = (contagens[(letra + chave) % 26] / total_letras) * 100 if total_letras else 0
+            if esperada > 0:
+                chi_quadrado += ((observada - esperada) ** 2) / esperada
+        pontuacoes.append(chi_quadrado)
+    
+    return pontuacoes
+
+def criptoanalise_cesar(texto_cifrado, mostrar_processo=True, decriptar_melhores=TOP_RESULTADOS):
     """
     Realiza criptoanálise da Cifra de César usando análise de frequência.
+    As letras são contadas uma única vez e apenas as melhores chaves são decriptadas.
     
     Args:
         texto_cifrado (str): Texto cifrado para quebrar
         mostrar_processo (bool): Se deve mostrar o processo de análise
+        decriptar_melhores (int | None): Quantos dos melhores resultados trazem o
+            texto decriptado (None = todos)
     
     Returns:
         list: Lista de tuplas (chave, pontuacao, texto_decriptado) ordenada por probabilidade
+              (texto_decriptado é None após os decriptar_melhores primeiros)
     """
+    contagens, total_letras = contar_letras(texto_cifrado)
+    pontuacoes = pontuar_chaves(contagens, total_letras)
+    
     if mostrar_processo:
         print("=== CRIPTOANÁLISE POR FREQUÊNCIA DE LETRAS ===")
         print(f"Texto cifrado: {texto_cifrado}")
-        texto_limpo = ''.join(c for c in texto_cifrado if c.isalpha())
-        print(f"Total de letras: {len(texto_limpo)}")
+        print(f"Total de letras: {total_letras}")
         
-        if len(texto_limpo) < 50:
+        if total_letras < 50:
             print("⚠️  AVISO: Texto curto. Análise pode ser imprecisa.")
         
         print("\nTestando todas as chaves possíveis...\n")
+        
+        for chave in range(1, 26):
+            # Só o trecho exibido é decriptado
+            preview = cifra_cesar_decriptar(texto_cifrado[:60], chave)
+            if len(texto_cifrado) > 60:
+                preview += "..."
+            print(f"Chave {chave:2d}: χ² = {pontuacoes[chave]:7.2f} | {preview}")
+    
+    # Testa todas as chaves de 1 a 25, ordenadas por pontuação (menor chi-quadrado = melhor)
+    chaves = sorted(range(1, 26), key=lambda chave: pontuacoes[chave])
+    if decriptar_melhores is None:
+        decriptar_melhores = len(chaves)
+    
+    return [(chave, pontuacoes[chave], cifra_cesar_decriptar(texto_cifrado, chave) if posicao < decriptar_melhores else None)
+            for posicao, chave in enumerate(chaves)]
+
+def melhor_chave(pontuacoes, total_letras):
+    """
+    Escolhe a melhor chave (1-25) e mede a confiança no resultado.
     
-    resultados = []
+    Args:
+        pontuacoes (list): Chi-quadrado de cada chave (índice = chave)
+        total_letras (int): Total de letras usado na pontuação
     
-    # Testa todas as chaves de 1 a 25
-    for chave in range(1, 26):
-        # Decripta com a chave atual
-        texto_decriptado = cifra_cesar_decriptar(texto_cifrado, chave)
-        
-        # Calcula frequências do texto decriptado
-        freq_observadas = calcular_frequencia_texto(texto_decriptado)
-        
-        # Calcula chi-quadrado (menor = melhor)
-        pontuacao = calcular_chi_quadrado(freq_observadas, FREQUENCIA_PORTUGUES)
-        
-        resultados.append((chave, pontuacao, texto_decriptado))
-        
-        if mostrar_processo:
-            preview = texto_decriptado[:60] + "..." if len(texto_decriptado) > 60 else texto_decriptado
-            print(f"Chave {chave:2d}: χ² = {pontuacao:7.2f} | {preview}")
+    Returns:
+        tuple: (chave, pontuacao, margem), onde margem é a diferença de
+               chi-quadrado para a segunda melhor chave em contagens de letras
+               (cresce com o tamanho do texto)
+    """
+    melhor, segunda = sorted(range(1, 26), key=lambda chave: pontuacoes[chave])[:2]
+    margem = (pontuacoes[segunda] - pontuacoes[melhor]) * total_letras / 100
+    return melhor, pontuacoes[melhor], margem
+
+def _prefixo_com_letras(texto, letras):
+    """
+    Conta as letras do menor prefixo do texto (aproximadamente) com pelo
+    menos a quantidade pedida de letras.
+    
+    Returns:
+        tuple: (contagens, total de letras, tamanho do prefixo)
+    """
+    tamanho = letras
+    while True:
+        contagens, total = contar_letras(texto[:tamanho])
+        if total >= letras or tamanho >= len(texto):
+            return contagens, total, min(tamanho, len(texto))
+        # Estima o tamanho necessário pela proporção de letras já observada
+        tamanho = tamanho * 2 if total == 0 else letras * tamanho // total + 1
+
+def recuperar_chave_amostrada(texto_cifrado, tamanhos_amostra=AMOSTRAS_PADRAO,
+                              margem_minima=MARGEM_MINIMA, verificar=False):
+    """
+    Recupera a chave analisando amostras crescentes do início do texto e
+    parando assim que a melhor chave se destaca o suficiente da segunda.
+    O tempo fica praticamente constante para textos longos.
+    
+    Args:
+        texto_cifrado (str | bytes): Texto cifrado
+        tamanhos_amostra (tuple): Tamanhos das amostras, em letras
+        margem_minima (float): Margem (ver melhor_chave) para aceitar uma amostra
+        verificar (bool): Se deve conferir o resultado com o texto completo
     
-    # Ordena por pontuação (menor chi-quadrado = melhor)
-    resultados.sort(key=lambda x: x[1])
+    Returns:
+        dict: chave, pontuacao, margem, letras_analisadas e verificada
+              (None se não verificada; se a verificação discordar, o resultado
+              do texto completo é retornado com verificada=False)
+    """
+    completo = True
+    for letras in tamanhos_amostra:
+        contagens, total, tamanho = _prefixo_com_letras(texto_cifrado, letras)
+        chave, pontuacao, margem = melhor_chave(pontuar_chaves(contagens, total), total)
+        completo = tamanho >= len(texto_cifrado)
+        if margem >= margem_minima or completo:
+            break
+    else:
+        # Nenhuma amostra foi suficiente: analisa o texto completo
+        contagens, total = contar_letras(texto_cifrado)
+        completo = True
+        chave, pontuacao, margem = melhor_chave(pontuar_chaves(contagens, total), total)
+    
+    resultado = {
+        'chave': chave,
+        'pontuacao': pontuacao,
+        'margem': margem,
+        'letras_analisadas': total,
+        'verificada': None,
+    }
+    
+    if verificar and not completo:
+        contagens, total = contar_letras(texto_cifrado)
+        chave_completa, pontuacao, margem = melhor_chave(pontuar_chaves(contagens, total), total)
+        resultado['verificada'] = chave_completa == chave
+        if chave_completa != chave:
+            resultado.update(chave=chave_completa, pontuacao=pontuacao, margem=margem, letras_analisadas=total)
     
-    return resultados
+    return resultado
 
-def mostrar_resultados_detalhados(resultados, top_n=5):
+def mostrar_resultados_detalhados(resultados, top_n=TOP_RESULTADOS):
     """
     Mostra os melhores resultados da criptoanálise de forma detalhada.
     
@@ -249,15 +385,7 @@ if __name__ == "__main__":
                 from random import randint
                 chave_real = randint(1, 25)
                 
-                # Encripta manualmente para demonstração
-                texto_cifrado = ""
-                for c in texto_original:
-                    if c.isalpha():
-                        base = 65 if c.isupper() else 97
-                        novo = chr((ord(c) - base + chave_real) % 26 + base)
-                        texto_cifrado += novo
-                    else:
-                        texto_cifrado += c
+                texto_cifrado = encriptar(texto_original, chave_real)
                 
                 print(f"Texto cifrado (chave {chave_real}): {texto_cifrado}")
                 
@@ -0,0 +1,214 @@
+"""
+Quebra em lote da Cifra de César
+Recebe muitos textos cifrados (diretório, arquivo JSONL ou qualquer iterável),
+quebra cada um com a pontuação por histograma em vários processos e produz os
+resultados (chave, pontuação, margem) como JSONL, na ordem da entrada, sem
+imprimir as tabelas intermediárias.
+
+Uso:
+    python quebra_em_lote.py ORIGEM [--saida resultados.jsonl] [--workers N]
+                             [--campo texto] [--amostrado] [--decriptar]
+
+ORIGEM pode ser um diretório (um texto por arquivo), um arquivo .jsonl (uma
+string JSON ou um objeto com o campo do texto por linha) ou "-" para ler
+JSONL da entrada padrão. Linhas inválidas viram resultados {"id", "erro"}
+sem interromper o lote.
+"""
+
+import argparse
+import collections
+import itertools
+import json
+import os
+import pathlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from cesar import decriptar
+from criptoanalise import contar_letras, melhor_chave, pontuar_chaves, recuperar_chave_amostrada
+
+# Campo com o texto cifrado nos objetos JSONL
+CAMPO_PADRAO = 'texto'
+
+# Textos enviados por vez a cada processo
+TEXTOS_POR_TAREFA = 64
+
+# Tarefas em andamento por processo (limita a memória com entradas muito grandes)
+TAREFAS_POR_PROCESSO = 4
+
+
+def ler_diretorio(diretorio):
+    """
+    Gera (identificador, caminho) para cada arquivo do diretório, em ordem alfabética.
+    Os arquivos são lidos pelos processos de trabalho, não pelo processo principal.
+    """
+    for nome in sorted(os.listdir(diretorio)):
+        caminho = pathlib.Path(diretorio, nome)
+        if caminho.is_file():
+            yield nome, caminho
+
+
+def ler_jsonl(linhas, campo=CAMPO_PADRAO):
+    """
+    Gera (identificador, texto) a partir de linhas JSONL.
+    Cada linha é uma string JSON ou um objeto com o campo indicado; o
+    identificador é o campo "id" do objeto ou o número da linha.
+    Uma linha inválida gera (número da linha, ValueError), que vira um
+    resultado com erro, e a leitura continua.
+    """
+    for numero, linha in enumerate(linhas, 1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except json.JSONDecodeError as e:
+            yield numero, ValueError(f"Linha {numero} não é um JSON válido: {e}")
+            continue
+        if isinstance(registro, str):
+            yield numero, registro
+        elif isinstance(registro, dict) and isinstance(registro.get(campo), str):
+            yield registro.get('id', numero), registro[campo]
+        else:
+            yield numero, ValueError(f"Linha {numero} não tem o campo de texto '{campo}'")
+
+
+def ler_entradas(origem, campo=CAMPO_PADRAO):
+    """
+    Gera (identificador, texto ou caminho) a partir de um diretório, de um
+    arquivo JSONL ou de "-" (JSONL na entrada padrão).
+    """
+    if origem == '-':
+        yield from ler_jsonl(sys.stdin, campo)
+    elif os.path.isdir(origem):
+        yield from ler_diretorio(origem)
+    else:
+        with open(origem, encoding='utf-8', errors='replace') as arquivo:
+            yield from ler_jsonl(arquivo, campo)
+
+
+def quebrar_texto(identificador, texto=None, caminho=None, amostrado=False, incluir_texto=False):
+    """
+    Quebra um único texto cifrado, sem imprimir nada.
+
+    Args:
+        identificador: Identificador do texto no resultado
+        texto (str): Texto cifrado (ou None se caminho for informado)
+        caminho (str): Arquivo com o texto cifrado
+        amostrado (bool): Se deve usar a recuperação amostrada (recuperar_chave_amostrada)
+        incluir_texto (bool): Se deve incluir o texto decriptado no resultado
+
+    Returns:
+        dict: id, chave, pontuacao e margem (e texto, se pedido), ou id e erro
+    """
+    if texto is None:
+        try:
+            with open(caminho, encoding='utf-8', errors='replace') as arquivo:
+                texto = arquivo.read()
+        except OSError as e:
+            return {'id': identificador, 'erro': str(e)}
+
+    if amostrado:
+        resultado = recuperar_chave_amostrada(texto)
+        chave, pontuacao, margem = resultado['chave'], resultado['pontuacao'], resultado['margem']
+    else:
+        contagens, total_letras = contar_letras(texto)
+        chave, pontuacao, margem = melhor_chave(pontuar_chaves(contagens, total_letras), total_letras)
+
+    saida = {'id': identificador, 'chave': chave, 'pontuacao': pontuacao, 'margem': margem}
+    if incluir_texto:
+        saida['texto'] = decriptar(texto, chave)
+    return saida
+
+
+def _quebrar_tarefa(itens, amostrado, incluir_texto):
+    """Quebra um grupo de itens (identificador, texto ou caminho) num processo de trabalho"""
+    return [{'id': identificador, 'erro': str(valor)} if isinstance(valor, ValueError)
+            else quebrar_texto(identificador, *_texto_ou_caminho(valor), amostrado, incluir_texto)
+            for identificador, valor in itens]
+
+
+def _texto_ou_caminho(valor):
+    """Itens de diretório trazem (identificador, caminho); os demais, o próprio texto"""
+    if isinstance(valor, os.PathLike):
+        return None, os.fspath(valor)
+    return valor, None
+
+
+def _normalizar(entradas):
+    """Aceita textos soltos ou pares (identificador, texto); numera os textos soltos"""
+    for numero, entrada in enumerate(entradas, 1):
+        if isinstance(entrada, str):
+            yield numero, entrada
+        else:
+            yield entrada
+
+
+def _agrupar(itens, tamanho):
+    """Agrupa os itens em listas de até tamanho elementos"""
+    itens = iter(itens)
+    while True:
+        grupo = list(itertools.islice(itens, tamanho))
+        if not grupo:
+            return
+        yield grupo
+
+
+def quebrar_em_lote(entradas, workers=None, amostrado=False, incluir_texto=False):
+    """
+    Quebra muitos textos cifrados, em paralelo, produzindo os resultados na
+    ordem da entrada à medida que ficam prontos.
+
+    Args:
+        entradas: Iterável de textos, de pares (identificador, texto) ou o
+                  resultado de ler_entradas
+        workers (int): Número de processos (None = todos os núcleos, 1 = sequencial)
+        amostrado (bool): Se deve usar a recuperação amostrada
+        incluir_texto (bool): Se deve incluir o texto decriptado nos resultados
+
+    Yields:
+        dict: Resultado de quebrar_texto para cada entrada
+    """
+    workers = workers or os.cpu_count() or 1
+    tarefas = _agrupar(_normalizar(entradas), TEXTOS_POR_TAREFA)
+
+    if workers == 1:
+        for tarefa in tarefas:
+            yield from _quebrar_tarefa(tarefa, amostrado, incluir_texto)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def enviar(tarefa):
+            return executor.submit(_quebrar_tarefa, tarefa, amostrado, incluir_texto)
+
+        # Fila limitada de tarefas em andamento (não carrega toda a entrada na
+        # memória): a cada resultado entregue, na ordem, a próxima tarefa é
+        # enviada, e os processos não ficam ociosos esperando a fila esvaziar
+        pendentes = collections.deque(map(enviar, itertools.islice(tarefas, workers * TAREFAS_POR_PROCESSO)))
+        while pendentes:
+            resultados = pendentes.popleft().result()
+            pendentes.extend(map(enviar, itertools.islice(tarefas, 1)))
+            yield from resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quebra em lote de textos cifrados com a Cifra de César")
+    parser.add_argument('origem', help='Diretório, arquivo JSONL ou "-" para JSONL na entrada padrão')
+    parser.add_argument('--saida', help='Arquivo JSONL de saída (padrão: saída padrão)')
+    parser.add_argument('--workers', type=int, help='Número de processos (padrão: todos os núcleos)')
+    parser.add_argument('--campo', default=CAMPO_PADRAO, help=f'Campo do texto nos objetos JSONL (padrão: {CAMPO_PADRAO})')
+    parser.add_argument('--amostrado', action='store_true', help='Usa a recuperação amostrada (textos longos)')
+    parser.add_argument('--decriptar', action='store_true', help='Inclui o texto decriptado nos resultados')
+    args = parser.parse_args()
+
+    saida = open(args.saida, 'w', encoding='utf-8') if args.saida else sys.stdout
+    try:
+        for resultado in quebrar_em_lote(ler_entradas(args.origem, args.campo), args.workers,
+                                         args.amostrado, args.decriptar):
+            saida.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,344 @@
+import argparse
+import contextlib
+import functools
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele, usa-se o caminho em Python puro
+    np = None
+
+# Um bloco de 64 bits como duas metades de 32 bits (big-endian)
+BLOCK_SIZE = 8
+BLOCK_STRUCT = struct.Struct(">II")
+
+
+def _substitute_nibble(nibble):
+    """
+    Substituição simples (S-box básica) de 4 bits: inversão dos bits + XOR
+    """
+    return ((~nibble) ^ 0x5) & 0xF
+
+
+def _rotate_left_32(value, amount):
+    return ((value << amount) | (value >> (32 - amount))) & 0xFFFFFFFF
+
+
+def _build_f_tables():
+    """
+    Tabelas da função F por byte: para cada uma das 4 posições de byte, a
+    substituição dos dois nibbles já deslocada para a sua posição e seguida da
+    permutação final (rotação de 7 bits). Como a rotação é linear, F vira um
+    XOR de 4 consultas às tabelas.
+    """
+    tables = []
+    for position in range(4):
+        table = []
+        for byte in range(256):
+            substituted = _substitute_nibble(byte & 0xF) | (_substitute_nibble(byte >> 4) << 4)
+            table.append(_rotate_left_32(substituted << (position * 8), 7))
+        tables.append(tuple(table))
+    return tuple(tables)
+
+
+# Calculadas uma única vez, ao importar o módulo
+F_TABLES = _build_f_tables()
+NP_F_TABLES = tuple(np.array(table, dtype=np.uint32) for table in F_TABLES) if np is not None else None
+
+# Blocos processados por lote no motor vetorizado (limita a memória temporária)
+BATCH_BLOCKS = 64 * 1024
+
+# Abaixo deste número de blocos o laço em Python puro é mais rápido que o NumPy
+NUMPY_MIN_BLOCKS = 64
+
+# Tamanhos de chave aceitos (bits) e máximo de escalonamentos de chave em cache
+KEY_SIZES = (64, 128)
+KEY_SCHEDULE_CACHE_SIZE = 256
+
+# Tamanho mínimo (bytes) para valer a pena distribuir o trabalho entre processos
+PARALLEL_MIN_BYTES = 1024 * 1024
+
+# Segmentos por processo no modo paralelo (equilibra a carga entre os núcleos)
+SEGMENTS_PER_WORKER = 4
+
+# Os buffers compartilhados do modo paralelo são alocados em múltiplos deste tamanho
+SHARED_BUFFER_ALIGN = 1024 * 1024
+
+# Janela (alinhada a blocos) processada por vez nos arquivos mapeados em memória
+MMAP_WINDOW_SIZE = 16 * 1024 * 1024
+
+
+def f_arrays(right, subkey):
+    """
+    Função F vetorizada (mesma de FeistelCipher._f_function) sobre um array
+    uint32 de metades direitas; subkey pode ser um inteiro ou um array
+    compatível por broadcasting (uma subchave por linha, por exemplo)
+    """
+    t0, t1, t2, t3 = NP_F_TABLES
+    # Expansão (rotação de 1 bit), XOR com a subchave e F por tabelas
+    x = ((right << np.uint32(1)) | (right >> np.uint32(31))) ^ np.uint32(subkey)
+    return t0[x & 0xFF] ^ t1[(x >> 8) & 0xFF] ^ t2[(x >> 16) & 0xFF] ^ t3[x >> 24]
+
+
+def _crypt_arrays(left, right, subkeys):
+    """
+    Motor vetorizado: aplica as rodadas a N blocos de uma vez, dados como
+    vetores uint32 das metades esquerda e direita. Retorna as metades de
+    saída já na ordem final (direita, esquerda).
+    """
+    for subkey in subkeys:
+        left, right = right, left ^ f_arrays(right, subkey)
+    return right, left
+
+
+def _crypt_into(data, output, subkeys):
+    """
+    Aplica as rodadas Feistel a todos os blocos de 8 bytes de data, escrevendo
+    em output (buffer gravável do mesmo tamanho)
+    """
+    if np is not None and len(data) >= NUMPY_MIN_BLOCKS * BLOCK_SIZE:
+        # Visões (sem cópia) como pares de palavras de 32 bits big-endian
+        halves_in = np.frombuffer(data, dtype='>u4').reshape(-1, 2)
+        halves_out = np.frombuffer(output, dtype='>u4').reshape(-1, 2)
+        
+        for start in range(0, len(halves_in), BATCH_BLOCKS):
+            batch = halves_in[start:start + BATCH_BLOCKS]
+            left, right = _crypt_arrays(batch[:, 0].astype(np.uint32),
+                                        batch[:, 1].astype(np.uint32), subkeys)
+            halves_out[start:start + BATCH_BLOCKS, 0] = left
+            halves_out[start:start + BATCH_BLOCKS, 1] = right
+        return
+    
+    pack_into = BLOCK_STRUCT.pack_into
+    t0, t1, t2, t3 = F_TABLES
+    
+    for offset, (left, right) in zip(range(0, len(data), BLOCK_SIZE), BLOCK_STRUCT.iter_unpack(data)):
+        for subkey in subkeys:
+            # Função F inline (mesma de _f_function), sem custo de chamada
+            x = (((right << 1) | (right >> 31)) & 0xFFFFFFFF) ^ subkey
+            left, right = right, left ^ t0[x & 0xFF] ^ t1[(x >> 8) & 0xFF] ^ t2[(x >> 16) & 0xFF] ^ t3[x >> 24]
+        # Combina as metades finais (inverte a ordem - característica Feistel)
+        pack_into(output, offset, right, left)
+
+
+@functools.lru_cache(maxsize=KEY_SCHEDULE_CACHE_SIZE)
+def _key_schedule(key_int, key_bits, rounds):
+    """
+    Gera as subchaves de 32 bits por rotação circular da chave principal
+    (passo de key_bits/16 bits por rodada: 4 bits para chaves de 64 bits).
+    Retorna (subchaves, subchaves em ordem reversa), em cache LRU por
+    (chave, tamanho, rodadas).
+    """
+    mask = (1 << key_bits) - 1
+    step = key_bits // 16
+    subkeys = []
+    
+    for i in range(rounds):
+        # Rotação circular para gerar subchaves diferentes
+        amount = (i * step) % key_bits
+        rotated = ((key_int << amount) | (key_int >> (key_bits - amount))) & mask
+        # Pega os 32 bits menos significativos como subchave
+        subkeys.append(rotated & 0xFFFFFFFF)
+    
+    subkeys = tuple(subkeys)
+    return subkeys, subkeys[::-1]
+
+
+# Estado de cada processo de trabalho, definido uma única vez pelo inicializador
+_worker_state = {}
+
+
+def _init_worker(subkeys, input_name, output_name):
+    """
+    Inicializador dos processos: recebe as subchaves e abre os buffers
+    compartilhados uma vez por processo, não a cada tarefa
+    """
+    _worker_state["subkeys"] = subkeys
+    _worker_state["input"] = shared_memory.SharedMemory(name=input_name)
+    _worker_state["output"] = shared_memory.SharedMemory(name=output_name)
+
+
+def _crypt_segment(start, end):
+    """Processa os bytes [start, end) do buffer compartilhado de entrada"""
+    _crypt_into(_worker_state["input"].buf[start:end],
+                _worker_state["output"].buf[start:end],
+                _worker_state["subkeys"])
+    return end - start
+
+
+class ParallelPool:
+    """
+    Processos de trabalho e buffers de entrada/saída em memória compartilhada,
+    criados na primeira chamada e reaproveitados nas seguintes (por exemplo,
+    entre os update de um ModeContext)
+
+    As subchaves e os nomes dos buffers vão a cada processo uma única vez,
+    pelo inicializador; as tarefas levam só os limites dos segmentos. Os
+    processos só são recriados se as subchaves mudarem ou se os dados não
+    couberem nos buffers.
+
+    Uso:
+        with ParallelPool(4) as pool:
+            saida = pool.crypt(dados, cipher.subkeys)
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = None
+        self._subkeys = None
+        self._input = None
+        self._output = None
+
+    def _start(self, size, subkeys):
+        """Inicia (ou reinicia) os processos para size bytes com estas subchaves"""
+        if self._executor is not None and self._subkeys == subkeys and self._input.size >= size:
+            return
+        self.close()
+        # Folga até o próximo MiB: os update de um fluxo variam alguns blocos de tamanho
+        capacity = -(-size // SHARED_BUFFER_ALIGN) * SHARED_BUFFER_ALIGN
+        self._input = shared_memory.SharedMemory(create=True, size=capacity)
+        self._output = shared_memory.SharedMemory(create=True, size=capacity)
+        self._subkeys = subkeys
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(list(subkeys), self._input.name, self._output.name))
+
+    def crypt(self, data, subkeys):
+        """
+        Divide os dados (tamanho múltiplo de 8) em segmentos alinhados a blocos
+        e os processa em paralelo, sem copiar os dados por tarefa
+        """
+        size = len(data)
+        segment_count = self.workers * SEGMENTS_PER_WORKER
+        segment_size = -(-size // segment_count // BLOCK_SIZE) * BLOCK_SIZE
+        starts = list(range(0, size, segment_size))
+        ends = [min(start + segment_size, size) for start in starts]
+        
+        self._start(size, tuple(subkeys))
+        self._input.buf[:size] = data
+        
+        # Cada segmento escreve na sua própria posição: a ordem é preservada
+        for _ in self._executor.map(_crypt_segment, starts, ends):
+            pass
+        return bytes(self._output.buf[:size])
+
+    def close(self):
+        """Encerra os processos e libera os buffers compartilhados"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for segment in (self._input, self._output):
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+        self._input = self._output = None
+        self._subkeys = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _crypt_bytes_parallel(data, subkeys, workers):
+    """
+    Processa os dados em paralelo com um pool usado só nesta chamada
+    (para várias chamadas seguidas, use um ParallelPool)
+    """
+    with ParallelPool(workers) as pool:
+        return pool.crypt(data, subkeys)
+
+
+def _crypt_mapped(source, destination, size, subkeys, window_size=MMAP_WINDOW_SIZE):
+    """
+    Aplica as rodadas aos primeiros size bytes (múltiplo de 8) do mapeamento
+    source, escrevendo no mapeamento destination, janela por janela e sem
+    copiar os dados para objetos Python
+    """
+    window_size = max(BLOCK_SIZE, window_size - window_size % BLOCK_SIZE)
+    with memoryview(source) as src, memoryview(destination) as dst:
+        for start in range(0, size, window_size):
+            end = min(start + window_size, size)
+            _crypt_into(src[start:end], dst[start:end], subkeys)
+
+
+@contextlib.contextmanager
+def _atomic_output(destination):
+    """
+    Abre um arquivo temporário no diretório de destination e só o move para
+    destination se o bloco terminar sem erro (o destino nunca fica com saída
+    parcial e pode ser o próprio arquivo de entrada)
+    """
+    directory = os.path.dirname(os.path.abspath(destination))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".feistel-", suffix=".tmp")
+    try:
+        # mkstemp cria o arquivo com modo 0600: aplica as permissões usuais (umask)
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        with os.fdopen(fd, "w+b") as file:
+            yield file
+        os.replace(temp_path, destination)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+        raise
+
+
+def _map_output(file, size):
+    """Pré-aloca o arquivo de saída com size bytes e o mapeia para escrita"""
+    file.truncate(size)
+    return mmap.mmap(file.fileno(), size, access=mmap.ACCESS_WRITE)
+
+
 class FeistelCipher:
-    def __init__(self, key="FEDCBA9876543210"):
+    def __init__(self, key="FEDCBA9876543210", rounds=16):
         """
         Inicializa a cifra Feistel com chave de 64 bits (16 hex chars)
+        ou de 128 bits (32 hex chars) e o número de rodadas desejado
         """
+        if len(key) * 4 not in KEY_SIZES:
+            raise ValueError("A chave deve ter 16 (64 bits) ou 32 (128 bits) caracteres hexadecimais")
+        if rounds < 1:
+            raise ValueError("O número de rodadas deve ser pelo menos 1")
+        
         self.key = key
-        self.rounds = 16
-        self.subkeys = self._generate_subkeys()
+        self.key_bits = len(key) * 4
+        self.rounds = rounds
+        # Subchaves de encriptação e, em ordem reversa, de decriptação (em cache por chave)
+        self.subkeys, self.decrypt_subkeys = _key_schedule(int(key, 16), self.key_bits, rounds)
+    
+    @staticmethod
+    def schedule_cache_info():
+        """
+        Estatísticas do cache de escalonamento de chaves
+        (hits, misses, maxsize, currsize)
+        """
+        return _key_schedule.cache_info()
+    
+    @staticmethod
+    def clear_schedule_cache():
+        """Esvazia o cache de escalonamento de chaves e zera os contadores"""
+        _key_schedule.cache_clear()
     
     def _generate_subkeys(self):
         """
-        Gera 16 subchaves de 32 bits a partir da chave principal
+        Gera as subchaves de 32 bits a partir da chave principal
         Implementação simples: rotação circular da chave
         """
-        subkeys = []
-        key_int = int(self.key, 16)
-        
-        for i in range(self.rounds):
-            # Rotação circular para gerar subchaves diferentes
-            rotated = ((key_int << (i * 4)) | (key_int >> (64 - (i * 4)))) & 0xFFFFFFFFFFFFFFFF
-            # Pega os 32 bits menos significativos como subchave
-            subkey = rotated & 0xFFFFFFFF
-            subkeys.append(subkey)
-        
-        return subkeys
+        return list(_key_schedule(int(self.key, 16), self.key_bits, self.rounds)[0])
     
     def _f_function(self, right_half, subkey):
         """
         Função F da estrutura Feistel
         Implementação simples: XOR com expansão e substituição básica
+        (substituição e permutação final feitas pelas tabelas F_TABLES)
         """
         # Expansão: duplica alguns bits para criar confusão
         expanded = ((right_half << 1) | (right_half >> 31)) & 0xFFFFFFFF
@@ -35,19 +346,10 @@ class FeistelCipher:
         # XOR com a subchave
         xor_result = expanded ^ subkey
         
-        # Substituição simples (S-box básica)
-        substituted = 0
-        for i in range(8):
-            # Pega 4 bits por vez
-            nibble = (xor_result >> (i * 4)) & 0xF
-            # Substituição simples: inversão dos bits + XOR
-            new_nibble = ((~nibble) ^ 0x5) & 0xF
-            substituted |= (new_nibble << (i * 4))
-        
-        # Permutação final
-        permuted = ((substituted << 7) | (substituted >> 25)) & 0xFFFFFFFF
-        
-        return permuted
+        # Substituição + permutação final, byte a byte
+        t0, t1, t2, t3 = F_TABLES
+        return (t0[xor_result & 0xFF] ^ t1[(xor_result >> 8) & 0xFF] ^
+                t2[(xor_result >> 16) & 0xFF] ^ t3[xor_result >> 24])
     
     def _feistel_round(self, left, right, subkey):
         """
@@ -77,7 +379,7 @@ class FeistelCipher:
         left = (plain_int >> 32) & 0xFFFFFFFF  # 32 bits mais significativos
         right = plain_int & 0xFFFFFFFF         # 32 bits menos significativos
         
-        # 16 rodadas de encriptação
+        # Rodadas de encriptação
         for round_num in range(self.rounds):
             left, right = self._feistel_round(left, right, self.subkeys[round_num])
         
@@ -85,50 +387,128 @@ class FeistelCipher:
         ciphertext_int = (right << 32) | left
         return f"{ciphertext_int:016X}"
     
-    def encrypt(self, plaintext):
+    def _crypt_bytes(self, data, subkeys, workers=1, pool=None):
+        """
+        Aplica as rodadas Feistel a todos os blocos de 8 bytes de data,
+        escrevendo num buffer de saída pré-alocado
+        workers > 1 distribui entradas grandes entre processos; pool (um
+        ParallelPool) reaproveita processos e buffers de chamadas anteriores
+        """
+        if len(data) % BLOCK_SIZE != 0:
+            raise ValueError("Os dados devem ter tamanho múltiplo de 8 bytes")
+        
+        if len(data) >= PARALLEL_MIN_BYTES:
+            if pool is not None:
+                return pool.crypt(data, subkeys)
+            if workers > 1:
+                return _crypt_bytes_parallel(data, subkeys, workers)
+        
+        output = bytearray(len(data))
+        _crypt_into(data, output, subkeys)
+        return bytes(output)
+    
+    def _crypt_int(self, value, subkeys):
+        """
+        Aplica as rodadas a um único bloco dado como inteiro de 64 bits
+        (usado pelos modos de operação encadeados, como CBC e OFB)
+        """
+        left = value >> 32
+        right = value & 0xFFFFFFFF
+        t0, t1, t2, t3 = F_TABLES
+        for subkey in subkeys:
+            x = (((right << 1) | (right >> 31)) & 0xFFFFFFFF) ^ subkey
+            left, right = right, left ^ t0[x & 0xFF] ^ t1[(x >> 8) & 0xFF] ^ t2[(x >> 16) & 0xFF] ^ t3[x >> 24]
+        return (right << 32) | left
+    
+    def _pad_bytes(self, data):
+        """
+        Completa os dados com bytes zero até um múltiplo de 8 bytes (64 bits)
+        """
+        remainder = len(data) % BLOCK_SIZE
+        if remainder != 0:
+            data = bytes(data) + bytes(BLOCK_SIZE - remainder)
+        return data
+    
+    def encrypt_bytes(self, data, workers=1):
+        """
+        Encripta bytes brutos em blocos de 64 bits (padding com zeros, como no texto hex)
+        data: bytes, bytearray ou memoryview
+        workers: número de processos para entradas grandes (1 = sequencial)
+        """
+        return self._crypt_bytes(self._pad_bytes(data), self.subkeys, workers)
+    
+    def decrypt_bytes(self, data, workers=1):
+        """
+        Decripta bytes brutos (tamanho múltiplo de 8 bytes)
+        """
+        return self._crypt_bytes(data, self.decrypt_subkeys, workers)
+    
+    def encrypt_file(self, source, destination, window_size=MMAP_WINDOW_SIZE):
+        """
+        Encripta um arquivo mapeando-o em memória (arquivos maiores que a RAM)
+        A saída é pré-alocada e recebe padding PKCS#7 no último bloco, para que
+        o tamanho original seja recuperado na decriptação.
+        A saída é escrita num arquivo temporário e só substitui destination
+        ao final (destination pode ser o próprio source).
+        """
+        with _atomic_output(destination) as dst, open(source, "rb") as src:
+            size = os.fstat(src.fileno()).st_size
+            full = size - size % BLOCK_SIZE
+            padding = BLOCK_SIZE - size % BLOCK_SIZE
+            out = _map_output(dst, full + BLOCK_SIZE)
+            try:
+                # Arquivos vazios não podem ser mapeados: só há o bloco de padding
+                tail = b""
+                if size > 0:
+                    with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        _crypt_mapped(data, out, full, self.subkeys, window_size)
+                        tail = data[full:size]
+                last = tail + bytes([padding]) * padding
+                out[full:] = self._crypt_bytes(last, self.subkeys)
+            finally:
+                out.close()
+    
+    def decrypt_file(self, source, destination, window_size=MMAP_WINDOW_SIZE):
+        """
+        Decripta um arquivo gerado por encrypt_file, removendo o padding PKCS#7
+        Se o padding for inválido (chave ou arquivo incorretos), destination
+        não é criado nem alterado.
+        """
+        with _atomic_output(destination) as dst, open(source, "rb") as src:
+            size = os.fstat(src.fileno()).st_size
+            if size == 0 or size % BLOCK_SIZE != 0:
+                raise ValueError("O arquivo cifrado deve ter tamanho múltiplo de 8 bytes")
+            
+            out = _map_output(dst, size)
+            try:
+                with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    _crypt_mapped(data, out, size, self.decrypt_subkeys, window_size)
+                padding = out[size - 1]
+                if not 1 <= padding <= BLOCK_SIZE or out[size - padding:] != bytes([padding]) * padding:
+                    raise ValueError("Padding PKCS#7 inválido (chave ou arquivo incorretos?)")
+            finally:
+                out.close()
+            dst.truncate(size - padding)
+    
+    def encrypt(self, plaintext, workers=1, trace=None):
         """
         Encripta o texto usando a estrutura Feistel
         plaintext: string hexadecimal de qualquer tamanho
+        workers: número de processos para textos grandes (1 = sequencial)
+        trace: função opcional trace(evento, **dados) que recebe os passos da
+               encriptação, inclusive o estado de cada rodada (ex.: PrintTracer())
         """
-        print(f"Texto original: {plaintext}")
-        print(f"Tamanho: {len(plaintext)} caracteres")
-        
         # Adiciona padding se necessário
         padded_text = self._pad_text(plaintext)
-        if len(padded_text) != len(plaintext):
-            print(f"Texto com padding: {padded_text}")
         
-        # Processa em blocos de 16 caracteres (64 bits cada)
-        ciphertext = ""
-        num_blocks = len(padded_text) // 16
+        # Encripta todos os blocos de uma vez pelo caminho em bytes
+        ciphertext = self.encrypt_bytes(bytes.fromhex(padded_text), workers).hex().upper()
         
-        print(f"\nProcessando {num_blocks} bloco(s) de 64 bits cada:")
-        print("\n--- Processo de Encriptação ---")
-        
-        for i in range(num_blocks):
-            start = i * 16
-            end = start + 16
-            block = padded_text[start:end]
-            
-            print(f"\nBloco {i + 1}: {block}")
-            
-            # Mostra o processo detalhado apenas para o primeiro bloco
-            if i == 0:
-                plain_int = int(block, 16)
-                left = (plain_int >> 32) & 0xFFFFFFFF
-                right = plain_int & 0xFFFFFFFF
-                print(f"L0: {left:08X}, R0: {right:08X}")
-                
-                for round_num in range(self.rounds):
-                    left, right = self._feistel_round(left, right, self.subkeys[round_num])
-                    print(f"Rodada {round_num + 1:2d}: L{round_num + 1} = {left:08X}, R{round_num + 1} = {right:08X}")
-                
-                encrypted_block = f"{((right << 32) | left):016X}"
-            else:
-                encrypted_block = self._encrypt_block(block)
-            
-            print(f"Bloco cifrado: {encrypted_block}")
-            ciphertext += encrypted_block
+        if trace is not None:
+            trace("input", operation="encrypt", text=plaintext)
+            if len(padded_text) != len(plaintext):
+                trace("padding", text=padded_text)
+            self._trace_blocks(trace, "encrypt", padded_text, ciphertext, self.subkeys)
         
         return ciphertext
     
@@ -141,7 +521,7 @@ class FeistelCipher:
         left = (cipher_int >> 32) & 0xFFFFFFFF  # 32 bits mais significativos
         right = cipher_int & 0xFFFFFFFF         # 32 bits menos significativos
         
-        # 16 rodadas de decriptação (usando subchaves em ordem reversa)
+        # Rodadas de decriptação (usando subchaves em ordem reversa)
         for round_num in range(self.rounds):
             subkey_index = self.rounds - 1 - round_num
             left, right = self._feistel_round(left, right, self.subkeys[subkey_index])
@@ -150,51 +530,84 @@ class FeistelCipher:
         plaintext_int = (right << 32) | left
         return f"{plaintext_int:016X}"
     
-    def decrypt(self, ciphertext):
+    def decrypt(self, ciphertext, workers=1, trace=None):
         """
         Decripta o texto usando a estrutura Feistel
         ciphertext: string hexadecimal de qualquer tamanho (múltiplo de 16)
+        workers: número de processos para textos grandes (1 = sequencial)
+        trace: função opcional trace(evento, **dados), como em encrypt
         """
         if len(ciphertext) % 16 != 0:
             raise ValueError("Ciphertext deve ter tamanho múltiplo de 16 caracteres hexadecimais")
         
-        print(f"\nTexto cifrado: {ciphertext}")
-        print(f"Tamanho: {len(ciphertext)} caracteres")
+        # Decripta todos os blocos de uma vez pelo caminho em bytes
+        plaintext = self.decrypt_bytes(bytes.fromhex(ciphertext), workers).hex().upper()
         
-        # Processa em blocos de 16 caracteres (64 bits cada)
-        plaintext = ""
-        num_blocks = len(ciphertext) // 16
+        if trace is not None:
+            trace("input", operation="decrypt", text=ciphertext)
+            self._trace_blocks(trace, "decrypt", ciphertext, plaintext, self.decrypt_subkeys)
         
-        print(f"\nProcessando {num_blocks} bloco(s) de 64 bits cada:")
-        print("\n--- Processo de Decriptação ---")
+        return plaintext
+    
+    def _trace_blocks(self, trace, operation, text, result, subkeys):
+        """
+        Caminho de rastreamento: refaz cada bloco rodada a rodada com
+        _feistel_round e envia os estados intermediários para trace
+        """
+        num_blocks = len(text) // 16
+        trace("blocks", operation=operation, num_blocks=num_blocks)
         
         for i in range(num_blocks):
             start = i * 16
             end = start + 16
-            block = ciphertext[start:end]
+            block = text[start:end]
+            trace("block", operation=operation, index=i, block=block)
             
-            print(f"\nBloco {i + 1}: {block}")
+            block_int = int(block, 16)
+            left = (block_int >> 32) & 0xFFFFFFFF
+            right = block_int & 0xFFFFFFFF
+            trace("round", operation=operation, index=i, round=0, left=left, right=right)
             
-            # Mostra o processo detalhado apenas para o primeiro bloco
-            if i == 0:
-                cipher_int = int(block, 16)
-                left = (cipher_int >> 32) & 0xFFFFFFFF
-                right = cipher_int & 0xFFFFFFFF
-                print(f"L0: {left:08X}, R0: {right:08X}")
-                
-                for round_num in range(self.rounds):
-                    subkey_index = self.rounds - 1 - round_num
-                    left, right = self._feistel_round(left, right, self.subkeys[subkey_index])
-                    print(f"Rodada {round_num + 1:2d}: L{round_num + 1} = {left:08X}, R{round_num + 1} = {right:08X}")
-                
-                decrypted_block = f"{((right << 32) | left):016X}"
-            else:
-                decrypted_block = self._decrypt_block(block)
+            for round_num, subkey in enumerate(subkeys, 1):
+                left, right = self._feistel_round(left, right, subkey)
+                trace("round", operation=operation, index=i, round=round_num, left=left, right=right)
             
-            print(f"Bloco decifrado: {decrypted_block}")
-            plaintext += decrypted_block
+            trace("block_result", operation=operation, index=i, block=result[start:end])
+    
+
+class PrintTracer:
+    """
+    Rastreador que imprime o processo de encriptação/decriptação, mostrando
+    as rodadas em detalhe apenas para os primeiros `detailed_blocks` blocos
+    """
+    
+    def __init__(self, detailed_blocks=1):
+        self.detailed_blocks = detailed_blocks
+    
+    def __call__(self, event, **data):
+        encrypting = data.get("operation") == "encrypt"
         
-        return plaintext
+        if event == "input":
+            if encrypting:
+                print(f"Texto original: {data['text']}")
+            else:
+                print(f"\nTexto cifrado: {data['text']}")
+            print(f"Tamanho: {len(data['text'])} caracteres")
+        elif event == "padding":
+            print(f"Texto com padding: {data['text']}")
+        elif event == "blocks":
+            print(f"\nProcessando {data['num_blocks']} bloco(s) de 64 bits cada:")
+            print(f"\n--- Processo de {'Encriptação' if encrypting else 'Decriptação'} ---")
+        elif event == "block":
+            print(f"\nBloco {data['index'] + 1}: {data['block']}")
+        elif event == "round" and data["index"] < self.detailed_blocks:
+            round_num = data["round"]
+            if round_num == 0:
+                print(f"L0: {data['left']:08X}, R0: {data['right']:08X}")
+            else:
+                print(f"Rodada {round_num:2d}: L{round_num} = {data['left']:08X}, R{round_num} = {data['right']:08X}")
+        elif event == "block_result":
+            print(f"Bloco {'cifrado' if encrypting else 'decifrado'}: {data['block']}")
     
 def run_test(cipher, test_number, plaintext, description):
     """
@@ -203,13 +616,13 @@ def run_test(cipher, test_number, plaintext, description):
     print(f"\n-- TESTE {test_number}: {description} --")
 
     print("\n-- ENCRIPTAÇÃO --")
-    ciphertext = cipher.encrypt(plaintext)
+    ciphertext = cipher.encrypt(plaintext, trace=PrintTracer())
     print(f"\nResultado da encriptação:")
     print(f"Texto original:  {plaintext}")
     print(f"Texto cifrado:   {ciphertext}")
     
     print("\n-- DECRIPTAÇÃO --")
-    decrypted = cipher.decrypt(ciphertext)
+    decrypted = cipher.decrypt(ciphertext, trace=PrintTracer())
     print(f"\nResultado da decriptação:")
     print(f"Texto original:  {plaintext}")
     print(f"Texto decifrado: {decrypted}")
@@ -221,7 +634,40 @@ def run_test(cipher, test_number, plaintext, description):
     if len(plaintext) != len(original_padded):
         print(f"Nota: Padding adicionado - Original: {len(plaintext)} chars, Com padding: {len(original_padded)} chars")
 
-def main():
+def run_cli(argv):
+    """
+    Linha de comando para cifrar arquivos:
+        python -m Feistel encrypt entrada saida [--key HEX] [--rounds N]
+        python -m Feistel decrypt entrada saida [--key HEX] [--rounds N]
+    """
+    parser = argparse.ArgumentParser(prog="python -m Feistel",
+                                     description="Cifra de Feistel para arquivos (mapeados em memória)")
+    parser.add_argument("operation", choices=("encrypt", "decrypt"), help="Operação a executar")
+    parser.add_argument("source", help="Arquivo de entrada")
+    parser.add_argument("destination", help="Arquivo de saída")
+    parser.add_argument("--key", default="FEDCBA9876543210",
+                        help="Chave em hexadecimal: 16 (64 bits) ou 32 (128 bits) caracteres")
+    parser.add_argument("--rounds", type=int, default=16, help="Número de rodadas (padrão: 16)")
+    parser.add_argument("--window", type=int, default=MMAP_WINDOW_SIZE,
+                        help=f"Bytes processados por janela (padrão: {MMAP_WINDOW_SIZE})")
+    args = parser.parse_args(argv)
+    
+    try:
+        cipher = FeistelCipher(args.key, args.rounds)
+        if args.operation == "encrypt":
+            cipher.encrypt_file(args.source, args.destination, args.window)
+        else:
+            cipher.decrypt_file(args.source, args.destination, args.window)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"ERRO: {e}\n")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        return run_cli(argv)
+    
     print("Cifra de Feistel - 16 rodadas\n")
     
     cipher = FeistelCipher()
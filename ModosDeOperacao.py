@@ -0,0 +1,353 @@
+"""
+Modos de Operação em Cifras de Bloco sobre a Cifra de Feistel
+ECB, CBC, CTR, OFB e CFB com IV/nonce, padding PKCS#7 e processamento
+incremental (update/finalize), permitindo cifrar arquivos em blocos com
+memória limitada.
+"""
+
+import os
+
+from Feistel import BLOCK_SIZE, PARALLEL_MIN_BYTES, FeistelCipher, ParallelPool, _atomic_output, np
+
+# Modos que cifram blocos inteiros (usam padding PKCS#7 por padrão)
+BLOCK_MODES = ("ECB", "CBC")
+
+# Modos que geram um fluxo de chave (o último bloco pode ser parcial)
+STREAM_MODES = ("CTR", "OFB", "CFB")
+
+MODES = BLOCK_MODES + STREAM_MODES
+
+# Tamanho dos pedaços lidos dos arquivos
+FILE_CHUNK_SIZE = 1024 * 1024
+
+# Pedaços maiores no modo paralelo, para amortizar a distribuição das tarefas entre os processos
+PARALLEL_FILE_CHUNK_SIZE = 64 * 1024 * 1024
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def pkcs7_pad(data):
+    """
+    Completa os dados até um múltiplo de 8 bytes com PKCS#7
+    (sempre adiciona de 1 a 8 bytes, todos com o valor da quantidade adicionada)
+    """
+    padding = BLOCK_SIZE - len(data) % BLOCK_SIZE
+    return bytes(data) + bytes([padding]) * padding
+
+
+def pkcs7_unpad(data):
+    """
+    Remove o padding PKCS#7, verificando se ele é válido
+    """
+    if len(data) == 0 or len(data) % BLOCK_SIZE != 0:
+        raise ValueError("Dados com padding devem ter tamanho múltiplo de 8 bytes")
+    padding = data[-1]
+    if not 1 <= padding <= BLOCK_SIZE or data[-padding:] != bytes([padding]) * padding:
+        raise ValueError("Padding PKCS#7 inválido")
+    return data[:-padding]
+
+
+def xor_bytes(a, b):
+    """XOR de duas sequências de bytes do mesmo tamanho"""
+    return (int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).to_bytes(len(a), "big")
+
+
+def counter_blocks(start, count):
+    """
+    Gera count blocos de contador consecutivos (64 bits, big-endian) a partir de start
+    """
+    if np is not None:
+        counters = (np.arange(count, dtype=np.uint64) + np.uint64(start)).astype(">u8")
+        return counters.tobytes()
+    return b"".join(((start + i) & MASK_64).to_bytes(BLOCK_SIZE, "big") for i in range(count))
+
+
+class ModeContext:
+    """
+    Contexto incremental de cifragem/decifragem num modo de operação
+
+    Uso:
+        ctx = ModeContext(cipher, "CBC")            # IV aleatório em ctx.iv
+        saida = ctx.update(parte1) + ctx.update(parte2) + ctx.finalize()
+
+    Apenas blocos completos são processados em update; o restante fica no
+    buffer até a próxima chamada ou até finalize.
+
+    Com workers > 1 os processos e os buffers compartilhados são criados uma
+    única vez e reaproveitados em todos os update; são liberados em finalize,
+    em close ou ao sair do bloco with:
+        with ModeContext(cipher, "CTR", workers=4) as ctx:
+            ...
+    """
+
+    def __init__(self, cipher, mode, iv=None, decrypt=False, padding=None, workers=1):
+        """
+        Args:
+            cipher: Instância de FeistelCipher
+            mode: "ECB", "CBC", "CTR", "OFB" ou "CFB"
+            iv: IV de 8 bytes (valor inicial do contador no CTR). Se omitido na
+                cifragem, é gerado com os.urandom; obrigatório na decifragem.
+            decrypt: True para decifrar
+            padding: Usa PKCS#7 (padrão: apenas para ECB e CBC)
+            workers: Processos usados nas etapas em que os blocos são
+                independentes (ECB, CTR e a decifragem de CBC e CFB)
+        """
+        mode = mode.upper()
+        if mode not in MODES:
+            raise ValueError(f"Modo desconhecido: {mode} (use um de {', '.join(MODES)})")
+
+        if mode == "ECB":
+            if iv is not None:
+                raise ValueError("O modo ECB não usa IV")
+        else:
+            if iv is None:
+                if decrypt:
+                    raise ValueError(f"O modo {mode} exige o IV usado na cifragem")
+                iv = os.urandom(BLOCK_SIZE)
+            if len(iv) != BLOCK_SIZE:
+                raise ValueError("O IV deve ter 8 bytes")
+            iv = bytes(iv)
+
+        self.cipher = cipher
+        self.mode = mode
+        self.iv = iv
+        self.decrypt = decrypt
+        self.padding = mode in BLOCK_MODES if padding is None else padding
+        self.workers = workers
+
+        # Bloco anterior (CBC/CFB), saída anterior (OFB) ou próximo contador (CTR)
+        self._register = int.from_bytes(iv, "big") if iv is not None else 0
+        self._buffer = bytearray()
+        self._finalized = False
+        self._pool = None
+
+        # Subchaves das operações da cifra de bloco: só ECB e CBC usam a decriptação
+        if decrypt and mode in BLOCK_MODES:
+            self._subkeys = cipher.decrypt_subkeys
+        else:
+            self._subkeys = cipher.subkeys
+
+    def update(self, data):
+        """
+        Processa mais dados e retorna a saída dos blocos completos disponíveis
+        """
+        if self._finalized:
+            raise ValueError("O contexto já foi finalizado")
+
+        self._buffer += data
+        usable = len(self._buffer) - len(self._buffer) % BLOCK_SIZE
+
+        # Na decifragem com padding o último bloco só é tratado em finalize
+        if self.decrypt and self.padding and usable == len(self._buffer):
+            usable -= BLOCK_SIZE
+        if usable <= 0:
+            return b""
+
+        chunk = bytes(self._buffer[:usable])
+        del self._buffer[:usable]
+        return self._process_blocks(chunk)
+
+    def finalize(self):
+        """
+        Processa o que restou no buffer (padding, bloco parcial) e encerra o contexto
+        """
+        if self._finalized:
+            raise ValueError("O contexto já foi finalizado")
+        self._finalized = True
+
+        tail = bytes(self._buffer)
+        self._buffer.clear()
+        try:
+            return self._finalize_tail(tail)
+        finally:
+            self.close()
+
+    def close(self):
+        """Encerra os processos de trabalho, se houver (finalize já chama close)"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _finalize_tail(self, tail):
+        """Padding ou bloco parcial do final da mensagem"""
+        if self.padding:
+            if self.decrypt:
+                if len(tail) != BLOCK_SIZE:
+                    raise ValueError("Texto cifrado truncado: tamanho não é múltiplo de 8 bytes")
+                return pkcs7_unpad(self._process_blocks(tail))
+            return self._process_blocks(pkcs7_pad(tail))
+
+        if not tail:
+            return b""
+        if self.mode in BLOCK_MODES:
+            raise ValueError(f"Sem padding, o modo {self.mode} exige tamanho múltiplo de 8 bytes")
+
+        # Modos de fluxo: último bloco parcial usa só o início do fluxo de chave
+        # (E do contador no CTR, da saída anterior no OFB, do bloco cifrado anterior no CFB)
+        keystream = self.cipher._crypt_int(self._register, self._subkeys).to_bytes(BLOCK_SIZE, "big")[:len(tail)]
+        return xor_bytes(tail, keystream)
+
+    def _process_blocks(self, chunk):
+        """Processa blocos completos conforme o modo e a direção"""
+        return getattr(self, f"_{self.mode.lower()}")(chunk)
+
+    def _crypt_bytes(self, data):
+        """
+        Cifra blocos independentes em lote; com workers > 1, o pool de
+        processos é criado na primeira entrada grande e reaproveitado
+        """
+        if self._pool is None and self.workers > 1 and len(data) >= PARALLEL_MIN_BYTES:
+            self._pool = ParallelPool(self.workers)
+        return self.cipher._crypt_bytes(data, self._subkeys, pool=self._pool)
+
+    def _ecb(self, chunk):
+        return self._crypt_bytes(chunk)
+
+    def _cbc(self, chunk):
+        if self.decrypt:
+            # Blocos independentes: decifra todos em lote e aplica o XOR com o anterior
+            decrypted = self._crypt_bytes(chunk)
+            previous = self._register.to_bytes(BLOCK_SIZE, "big") + chunk[:-BLOCK_SIZE]
+            self._register = int.from_bytes(chunk[-BLOCK_SIZE:], "big")
+            return xor_bytes(decrypted, previous)
+
+        # Cifragem encadeada: cada bloco depende do anterior
+        crypt_int = self.cipher._crypt_int
+        subkeys = self._subkeys
+        previous = self._register
+        output = bytearray(len(chunk))
+        for offset in range(0, len(chunk), BLOCK_SIZE):
+            block = int.from_bytes(chunk[offset:offset + BLOCK_SIZE], "big")
+            previous = crypt_int(block ^ previous, subkeys)
+            output[offset:offset + BLOCK_SIZE] = previous.to_bytes(BLOCK_SIZE, "big")
+        self._register = previous
+        return bytes(output)
+
+    def _ctr(self, chunk):
+        # Contadores independentes: o fluxo de chave do lote é cifrado de uma vez
+        count = len(chunk) // BLOCK_SIZE
+        keystream = self._crypt_bytes(counter_blocks(self._register, count))
+        self._register = (self._register + count) & MASK_64
+        return xor_bytes(chunk, keystream)
+
+    def _ofb(self, chunk):
+        crypt_int = self.cipher._crypt_int
+        subkeys = self._subkeys
+        register = self._register
+        keystream = bytearray(len(chunk))
+        for offset in range(0, len(chunk), BLOCK_SIZE):
+            register = crypt_int(register, subkeys)
+            keystream[offset:offset + BLOCK_SIZE] = register.to_bytes(BLOCK_SIZE, "big")
+        self._register = register
+        return xor_bytes(chunk, keystream)
+
+    def _cfb(self, chunk):
+        if self.decrypt:
+            # Os blocos cifrados já são conhecidos: fluxo de chave em lote
+            previous = self._register.to_bytes(BLOCK_SIZE, "big") + chunk[:-BLOCK_SIZE]
+            keystream = self._crypt_bytes(previous)
+            self._register = int.from_bytes(chunk[-BLOCK_SIZE:], "big")
+            return xor_bytes(chunk, keystream)
+
+        crypt_int = self.cipher._crypt_int
+        subkeys = self._subkeys
+        previous = self._register
+        output = bytearray(len(chunk))
+        for offset in range(0, len(chunk), BLOCK_SIZE):
+            block = int.from_bytes(chunk[offset:offset + BLOCK_SIZE], "big")
+            previous = block ^ crypt_int(previous, subkeys)
+            output[offset:offset + BLOCK_SIZE] = previous.to_bytes(BLOCK_SIZE, "big")
+        self._register = previous
+        return bytes(output)
+
+
+def encrypt(cipher, mode, data, iv=None, padding=None, workers=1):
+    """
+    Cifra data de uma vez. Retorna (iv, texto_cifrado)
+    """
+    with ModeContext(cipher, mode, iv=iv, padding=padding, workers=workers) as ctx:
+        return ctx.iv, ctx.update(data) + ctx.finalize()
+
+
+def decrypt(cipher, mode, data, iv=None, padding=None, workers=1):
+    """
+    Decifra data de uma vez
+    """
+    with ModeContext(cipher, mode, iv=iv, decrypt=True, padding=padding, workers=workers) as ctx:
+        return ctx.update(data) + ctx.finalize()
+
+
+def _file_chunk_size(chunk_size, workers):
+    if chunk_size is not None:
+        return chunk_size
+    return PARALLEL_FILE_CHUNK_SIZE if workers > 1 else FILE_CHUNK_SIZE
+
+
+def encrypt_file(cipher, mode, source, destination, iv=None, chunk_size=None, workers=1):
+    """
+    Cifra um arquivo em pedaços de chunk_size bytes (memória limitada)
+    O IV é gravado nos primeiros 8 bytes do arquivo de saída (exceto no ECB).
+    Com workers > 1, um único pool de processos atende todos os pedaços.
+    A saída vai para um arquivo temporário, movido para destination só ao
+    final (destination pode ser o próprio source).
+    """
+    chunk_size = _file_chunk_size(chunk_size, workers)
+    with ModeContext(cipher, mode, iv=iv, workers=workers) as ctx, \
+            _atomic_output(destination) as dst, open(source, "rb") as src:
+        if ctx.iv is not None:
+            dst.write(ctx.iv)
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            dst.write(ctx.update(chunk))
+        dst.write(ctx.finalize())
+
+
+def decrypt_file(cipher, mode, source, destination, chunk_size=None, workers=1):
+    """
+    Decifra um arquivo gerado por encrypt_file
+    Com workers > 1, um único pool de processos atende todos os pedaços.
+    Se o padding for inválido (chave errada, arquivo corrompido), destination
+    não é alterado.
+    """
+    chunk_size = _file_chunk_size(chunk_size, workers)
+    with _atomic_output(destination) as dst, open(source, "rb") as src:
+        iv = None if mode.upper() == "ECB" else src.read(BLOCK_SIZE)
+        with ModeContext(cipher, mode, iv=iv, decrypt=True, workers=workers) as ctx:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                dst.write(ctx.update(chunk))
+            dst.write(ctx.finalize())
+
+
+def main():
+    print("Modos de Operação sobre a Cifra de Feistel\n")
+
+    cipher = FeistelCipher()
+    mensagem = "Mensagem de teste para os modos de operação da cifra de Feistel".encode("utf-8")
+    print(f"Chave utilizada: {cipher.key}")
+    print(f"Mensagem: {mensagem.decode('utf-8')} ({len(mensagem)} bytes)")
+
+    for mode in MODES:
+        iv, cifrado = encrypt(cipher, mode, mensagem)
+        decifrado = decrypt(cipher, mode, cifrado, iv=iv)
+
+        print(f"\n-- {mode} --")
+        if iv is not None:
+            print(f"IV: {iv.hex().upper()}")
+        print(f"Texto cifrado: {cifrado.hex().upper()}")
+        print(f"Texto decifrado: {decifrado.decode('utf-8')}")
+        print(f"Correto: {'SIM' if decifrado == mensagem else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Estatísticas de avalanche e difusão da Cifra de Feistel
+
+Para cada rodada, mede a probabilidade de cada um dos 64 bits do estado
+mudar quando se inverte um bit do texto claro (matriz 64x64) ou um bit da
+chave (matriz bits_da_chave x 64), sobre uma amostra grande de blocos
+aleatórios. As rodadas são aplicadas em lote (vetores NumPy) com a mesma
+função de rodada de FeistelCipher._feistel_round, conferida contra ela.
+
+Numa cifra com boa difusão todas as probabilidades tendem a 0,5; a rodada
+em que isso acontece indica quantas rodadas são realmente necessárias.
+
+Uso:
+    python avalanche_feistel.py [--samples 1000000] [--rounds 16] [--key HEX]
+                                [--tolerance 0.01] [--workers N] [--output matrizes.npz] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Feistel import FeistelCipher, f_arrays
+
+# Blocos processados por lote (limita a memória temporária)
+AVALANCHE_BATCH = 8 * 1024
+
+DEFAULT_SAMPLES = 100000
+
+# Desvio máximo de 0,5 aceito para considerar a avalanche completa
+DEFAULT_TOLERANCE = 0.01
+
+# Blocos somados por vez em cada contador de 8 bits (máximo sem estouro)
+LANE_GROUP = 255
+
+
+def round_states(left, right, subkeys):
+    """
+    Aplica as rodadas em lote e produz o estado (esquerda, direita) após cada
+    uma, como em FeistelCipher._feistel_round
+    """
+    for subkey in subkeys:
+        left, right = right, left ^ f_arrays(right, subkey)
+        yield left, right
+
+
+def verify_against_reference(cipher, blocks=64, seed=0):
+    """
+    Confere os estados intermediários do motor em lote com os de
+    FeistelCipher._feistel_round para alguns blocos aleatórios
+    """
+    rng = np.random.default_rng(seed)
+    left = rng.integers(0, 1 << 32, size=blocks, dtype=np.uint32)
+    right = rng.integers(0, 1 << 32, size=blocks, dtype=np.uint32)
+    expected = [(int(l), int(r)) for l, r in zip(left, right)]
+
+    for subkey, (batch_left, batch_right) in zip(cipher.subkeys, round_states(left, right, cipher.subkeys)):
+        expected = [cipher._feistel_round(l, r, subkey) for l, r in expected]
+        if expected != list(zip(batch_left.tolist(), batch_right.tolist())):
+            raise RuntimeError("O motor em lote diverge de FeistelCipher._feistel_round")
+
+
+def _bit_counts(diff):
+    """
+    Para cada variante (linha), quantas vezes cada um dos 32 bits de uma
+    metade mudou (bit 0 = mais significativo)
+    Soma os bits em paralelo em 4 contadores de 8 bits por palavra (grupos de
+    até 255 blocos, sem estouro), o que evita desempacotar bit a bit.
+    """
+    variants, count = diff.shape
+    if count % LANE_GROUP:
+        diff = np.pad(diff, ((0, 0), (0, LANE_GROUP - count % LANE_GROUP)))
+    groups = diff.reshape(variants, -1, LANE_GROUP)
+
+    # counts[variante, byte b da palavra, deslocamento s] = vezes em que o bit 8b + s mudou
+    counts = np.empty((variants, 4, 8), dtype=np.int64)
+    for shift in range(8):
+        lanes = ((groups >> np.uint32(shift)) & np.uint32(0x01010101)).sum(axis=2, dtype=np.uint32)
+        counts[:, :, shift] = lanes.astype("<u4").view(np.uint8).reshape(variants, -1, 4).sum(axis=1)
+
+    # Reordena do bit menos significativo para o mais significativo primeiro
+    return counts.reshape(variants, 32)[:, ::-1]
+
+
+def _flip_counts(left, right, subkeys, flipped_left, flipped_right, flipped_subkeys):
+    """
+    Contagens de bits alterados por rodada entre o lote original (vetores) e
+    as variantes (matrizes variantes x blocos)
+    Retorna array (rodadas, variantes, 64).
+    Como a metade esquerda após a rodada r é a direita após a rodada r - 1,
+    só a metade direita nova é contada a cada rodada.
+    """
+    variants = len(flipped_left)
+    previous_right = _bit_counts(np.broadcast_to(right ^ flipped_right, (variants, len(right))))
+    counts = []
+    for (a_left, a_right), (b_left, b_right) in zip(round_states(left, right, subkeys),
+                                                    round_states(flipped_left, flipped_right, flipped_subkeys)):
+        current_right = _bit_counts(a_right ^ b_right)
+        counts.append(np.concatenate((previous_right, current_right), axis=1))
+        previous_right = current_right
+    return np.stack(counts)
+
+
+def _flipped_key_subkeys(cipher):
+    """
+    Subchaves de cada chave com um bit invertido (0 = mais significativo),
+    como array (rodadas, bits da chave, 1) para aplicar a todas de uma vez
+    """
+    key = int(cipher.key, 16)
+    subkeys = [FeistelCipher(f"{key ^ (1 << (cipher.key_bits - 1 - bit)):0{len(cipher.key)}X}", cipher.rounds).subkeys
+               for bit in range(cipher.key_bits)]
+    return np.array(subkeys, dtype=np.uint32).T[:, :, None]
+
+
+def _batches(samples):
+    """Lotes (índice, tamanho) da amostra; cada índice tem sua própria semente"""
+    return [(index, min(AVALANCHE_BATCH, samples - start))
+            for index, start in enumerate(range(0, samples, AVALANCHE_BATCH))]
+
+
+def _avalanche_counts(key, rounds, batches, seed, key_bits):
+    """
+    Contagens de bits alterados por rodada para os lotes indicados
+    (executada em cada processo de trabalho quando workers > 1)
+    """
+    cipher = FeistelCipher(key, rounds)
+    # Máscaras de inversão de cada bit do texto, nas metades esquerda e direita
+    masks = np.uint32(1) << (31 - np.arange(64) % 32).astype(np.uint32)
+    left_masks = np.where(np.arange(64) < 32, masks, 0).astype(np.uint32)[:, None]
+    right_masks = np.where(np.arange(64) >= 32, masks, 0).astype(np.uint32)[:, None]
+    key_subkeys = _flipped_key_subkeys(cipher) if key_bits else None
+
+    plaintext_counts = np.zeros((rounds, 64, 64), dtype=np.int64)
+    key_counts = np.zeros((rounds, cipher.key_bits if key_bits else 0, 64), dtype=np.int64)
+
+    for index, count in batches:
+        rng = np.random.default_rng([seed, index])
+        left = rng.integers(0, 1 << 32, size=count, dtype=np.uint32)
+        right = rng.integers(0, 1 << 32, size=count, dtype=np.uint32)
+
+        plaintext_counts += _flip_counts(left, right, cipher.subkeys,
+                                         left ^ left_masks, right ^ right_masks, cipher.subkeys)
+        if key_bits:
+            variants = (cipher.key_bits, count)
+            key_counts += _flip_counts(left, right, cipher.subkeys,
+                                       np.broadcast_to(left, variants), np.broadcast_to(right, variants),
+                                       key_subkeys)
+
+    return plaintext_counts, key_counts
+
+
+def avalanche_matrices(cipher, samples=DEFAULT_SAMPLES, seed=0, key_bits=True, workers=1):
+    """
+    Matrizes de probabilidade de inversão por rodada
+
+    Retorna {"plaintext": array (rodadas, 64, 64), "key": array (rodadas,
+    bits da chave, 64)}, onde [r, i, j] é a probabilidade de o bit j do estado
+    após a rodada r + 1 mudar quando o bit i da entrada é invertido.
+    As 64 (ou key_bits) variantes de cada bloco são cifradas juntas.
+    workers > 1 distribui os lotes entre processos (mesmo resultado).
+    """
+    batches = _batches(samples)
+    if workers <= 1:
+        plaintext_counts, key_counts = _avalanche_counts(cipher.key, cipher.rounds, batches, seed, key_bits)
+    else:
+        shares = [batches[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_avalanche_counts, [cipher.key] * workers, [cipher.rounds] * workers,
+                                        shares, [seed] * workers, [key_bits] * workers))
+        plaintext_counts = sum(result[0] for result in results)
+        key_counts = sum(result[1] for result in results)
+
+    return {"plaintext": plaintext_counts / samples, "key": key_counts / samples}
+
+
+def round_summary(matrices, tolerance=DEFAULT_TOLERANCE):
+    """
+    Resumo por rodada: média, extremos, maior desvio de 0,5 e fração das
+    entradas dentro da tolerância
+    """
+    summary = []
+    for round_index, matrix in enumerate(matrices, 1):
+        deviation = np.abs(matrix - 0.5)
+        summary.append({
+            "round": round_index,
+            "mean": float(matrix.mean()),
+            "min": float(matrix.min()),
+            "max": float(matrix.max()),
+            "max_deviation": float(deviation.max()),
+            "within_tolerance": float((deviation <= tolerance).mean()),
+        })
+    return summary
+
+
+def rounds_for_avalanche(summary, tolerance=DEFAULT_TOLERANCE):
+    """Primeira rodada em que todas as probabilidades estão a até tolerance de 0,5"""
+    for entry in summary:
+        if entry["max_deviation"] <= tolerance:
+            return entry["round"]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Efeito avalanche por rodada da Cifra de Feistel")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="Blocos aleatórios na amostra")
+    parser.add_argument("--rounds", type=int, default=16, help="Número de rodadas da cifra")
+    parser.add_argument("--key", default="FEDCBA9876543210", help="Chave da cifra (hex)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Desvio aceito de 0,5")
+    parser.add_argument("--seed", type=int, default=0, help="Semente da amostra")
+    parser.add_argument("--workers", type=int, default=1, help="Número de processos")
+    parser.add_argument("--no-key", action="store_true", help="Não mede a avalanche dos bits da chave")
+    parser.add_argument("--output", help="Grava as matrizes completas num arquivo .npz")
+    parser.add_argument("--json", action="store_true", help="Imprime o resumo em JSON")
+    args = parser.parse_args()
+
+    cipher = FeistelCipher(args.key, args.rounds)
+    verify_against_reference(cipher)
+
+    start = time.perf_counter()
+    matrices = avalanche_matrices(cipher, args.samples, args.seed, key_bits=not args.no_key, workers=args.workers)
+    seconds = time.perf_counter() - start
+
+    if args.output:
+        np.savez_compressed(args.output, plaintext=matrices["plaintext"], key=matrices["key"])
+
+    report = {"samples": args.samples, "rounds": args.rounds, "seconds": seconds}
+    for name in ("plaintext", "key"):
+        if matrices[name].size:
+            summary = round_summary(matrices[name], args.tolerance)
+            report[name] = {"summary": summary, "rounds_for_avalanche": rounds_for_avalanche(summary, args.tolerance)}
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f"Efeito avalanche da Cifra de Feistel ({args.samples:,d} blocos, {seconds:.1f}s)")
+    for name, title in (("plaintext", "Bits do texto claro"), ("key", "Bits da chave")):
+        if name not in report:
+            continue
+        print(f"\n-- {title} --")
+        print(f"{'Rodada':>6}  {'Média':>6}  {'Mín':>6}  {'Máx':>6}  {'Desvio máx':>10}  {'Na tolerância':>13}")
+        for entry in report[name]["summary"]:
+            print(f"{entry['round']:>6}  {entry['mean']:>6.3f}  {entry['min']:>6.3f}  {entry['max']:>6.3f}  "
+                  f"{entry['max_deviation']:>10.3f}  {entry['within_tolerance']:>12.1%}")
+        needed = report[name]["rounds_for_avalanche"]
+        print(f"Avalanche completa (±{args.tolerance}): "
+              f"{f'a partir da rodada {needed}' if needed else 'não atingida'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmark de desempenho da Cifra de Feistel
+Mede blocos/s e MB/s das operações por bloco, do caminho hexadecimal, do
+caminho em bytes e dos modos de operação, para entradas de 1 bloco a 100 MB.
+Os resultados são gravados em JSON para comparação entre execuções.
+
+Uso:
+    python benchmark_feistel.py [--sizes 8,1K,1M,100M] [--output resultado.json]
+                                [--compare anterior.json] [--workers N]
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import sys
+import time
+
+import Feistel
+import ModosDeOperacao
+from Feistel import BLOCK_SIZE, FeistelCipher
+
+DEFAULT_SIZES = "8,1K,64K,1M,16M,100M"
+
+# Operações bloco a bloco (hex e CBC encadeado) são lentas: limita o tamanho medido
+PER_BLOCK_MAX_SIZE = 1024 * 1024
+
+# Tempo mínimo de medição por caso (repete a operação até atingi-lo)
+MIN_TIME = 0.2
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    """Converte '64K', '1M', '8' em bytes (arredondado para blocos de 8 bytes)"""
+    text = text.strip().upper()
+    multiplier = UNITS.get(text[-1], 1)
+    number = text[:-1] if text[-1] in UNITS else text
+    size = int(float(number) * multiplier)
+    return max(BLOCK_SIZE, size - size % BLOCK_SIZE)
+
+
+def measure(function, min_time=MIN_TIME):
+    """Executa function repetidamente e retorna (melhor tempo, repetições)"""
+    best = float("inf")
+    total = 0.0
+    repeats = 0
+    while repeats == 0 or total < min_time:
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        repeats += 1
+    return best, repeats
+
+
+def benchmark_cases(cipher, data, workers):
+    """
+    Casos de benchmark para uma entrada: (nome, preparação, limite de tamanho)
+    A preparação monta as entradas derivadas (hex, texto cifrado) e retorna a
+    função medida; assim só os casos executados pagam por elas, uma vez por tamanho.
+    """
+    @functools.lru_cache(maxsize=None)
+    def hex_text():
+        return data.hex().upper()
+
+    @functools.lru_cache(maxsize=None)
+    def encrypted():
+        return cipher.encrypt_bytes(data)
+
+    @functools.lru_cache(maxsize=None)
+    def encrypted_hex():
+        return encrypted().hex().upper()
+
+    def raw():
+        return data
+
+    iv = bytes(BLOCK_SIZE)
+
+    def call(function, *inputs, **kwargs):
+        def prepare():
+            args = [make() for make in inputs]
+            return lambda: function(*args, **kwargs)
+        return prepare
+
+    def per_block(operation, make_text):
+        def prepare():
+            text = make_text()
+            def run():
+                for start in range(0, len(text), 16):
+                    operation(text[start:start + 16])
+            return run
+        return prepare
+
+    ctr_encrypt = functools.partial(ModosDeOperacao.encrypt, cipher, "CTR")
+    cbc_encrypt = functools.partial(ModosDeOperacao.encrypt, cipher, "CBC")
+    cbc_decrypt = functools.partial(ModosDeOperacao.decrypt, cipher, "CBC")
+    cases = [
+        ("_encrypt_block", per_block(cipher._encrypt_block, hex_text), PER_BLOCK_MAX_SIZE),
+        ("_decrypt_block", per_block(cipher._decrypt_block, encrypted_hex), PER_BLOCK_MAX_SIZE),
+        ("encrypt", call(cipher.encrypt, hex_text), None),
+        ("decrypt", call(cipher.decrypt, encrypted_hex), None),
+        ("encrypt_bytes", call(cipher.encrypt_bytes, raw), None),
+        ("decrypt_bytes", call(cipher.decrypt_bytes, encrypted), None),
+        ("ctr_encrypt", call(ctr_encrypt, raw, iv=iv), None),
+        ("cbc_encrypt", call(cbc_encrypt, raw, iv=iv), PER_BLOCK_MAX_SIZE),
+        ("cbc_decrypt", call(cbc_decrypt, encrypted, iv=iv, padding=False), None),
+    ]
+    # Abaixo de PARALLEL_MIN_BYTES a cifra não usa os processos: o caso mediria o caminho sequencial
+    if workers > 1 and len(data) >= Feistel.PARALLEL_MIN_BYTES:
+        cases += [
+            (f"encrypt_bytes_workers{workers}", call(cipher.encrypt_bytes, raw, workers=workers), None),
+            (f"ctr_encrypt_workers{workers}", call(ctr_encrypt, raw, iv=iv, workers=workers), None),
+        ]
+    return cases
+
+
+def run_benchmarks(sizes, workers=1, only=None, verbose=True):
+    """
+    Executa todos os casos para cada tamanho e retorna a lista de resultados
+    """
+    cipher = FeistelCipher()
+    results = []
+
+    for size in sizes:
+        data = os.urandom(size)
+        for name, prepare, max_size in benchmark_cases(cipher, data, workers):
+            if only and name not in only:
+                continue
+            if max_size is not None and size > max_size:
+                continue
+
+            seconds, repeats = measure(prepare())
+            blocks = size // BLOCK_SIZE
+            result = {
+                "name": name,
+                "size": size,
+                "blocks": blocks,
+                "seconds": seconds,
+                "repeats": repeats,
+                "blocks_per_second": blocks / seconds,
+                "mb_per_second": size / seconds / 1e6,
+            }
+            results.append(result)
+
+            if verbose:
+                print(f"{name:28s} {size:>11,d} B  {result['blocks_per_second']:>14,.0f} blocos/s  "
+                      f"{result['mb_per_second']:>9.3f} MB/s", file=sys.stderr)
+
+    return results
+
+
+def compare(results, baseline):
+    """Mostra a razão de desempenho em relação a uma execução anterior"""
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    print("\n-- Comparação com a execução anterior --", file=sys.stderr)
+    for result in results:
+        old = previous.get((result["name"], result["size"]))
+        if old is None:
+            continue
+        ratio = result["mb_per_second"] / old["mb_per_second"]
+        print(f"{result['name']:28s} {result['size']:>11,d} B  {ratio:6.2f}x", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de desempenho da Cifra de Feistel")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Tamanhos das entradas separados por vírgula (padrão: {DEFAULT_SIZES})")
+    parser.add_argument("--only", help="Executa apenas os casos indicados (separados por vírgula)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Inclui os casos com N processos (entradas a partir de 1 MB)")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: saída padrão)")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    only = set(args.only.split(",")) if args.only else None
+    results = run_benchmarks(sizes, args.workers, only)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": Feistel.np.__version__ if Feistel.np is not None else None,
+        "results": results,
+    }
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
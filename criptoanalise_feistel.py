@@ -0,0 +1,316 @@
+"""
+Criptoanálise diferencial e linear da Cifra de Feistel
+
+Calcula as tabelas de distribuição de diferenças (DDT) e de aproximações
+lineares (LAT) da substituição usada pela função F e executa experimentos
+com textos claros escolhidos sobre milhões de pares de blocos, cifrados em
+lote pelo motor vetorizado (Feistel._crypt_arrays).
+
+A substituição de nibbles (~n) ^ 0x5 é afim (equivale a n ^ 0xA), então
+F(R) = rotl8(R) ^ constante(subchave) e a cifra inteira é afim sobre GF(2):
+toda diferença de entrada leva a uma única diferença de saída com
+probabilidade 1, em qualquer número de rodadas. O experimento de
+recuperação afim mostra a consequência: 65 textos escolhidos bastam para
+decifrar qualquer bloco sem conhecer a chave.
+
+Uso:
+    python criptoanalise_feistel.py [--rounds 1-16] [--pairs 1000000]
+                                    [--delta HEX] [--key HEX] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from Feistel import FeistelCipher, _crypt_arrays, _substitute_nibble, f_arrays
+
+# Blocos cifrados por lote nos experimentos (limita a memória temporária)
+EXPERIMENT_BATCH = 1024 * 1024
+
+# Diferença de entrada padrão: um único bit na metade direita
+DEFAULT_DELTA = 0x0000000000000001
+
+DEFAULT_KEY = "FEDCBA9876543210"
+
+MASK_32 = 0xFFFFFFFF
+
+
+def nibble_sbox():
+    """S-box de 4 bits usada pela função F"""
+    return np.array([_substitute_nibble(n) for n in range(16)], dtype=np.uint32)
+
+
+def byte_sbox():
+    """Substituição aplicada a cada byte da entrada de F (dois nibbles)"""
+    nibbles = nibble_sbox()
+    values = np.arange(256, dtype=np.uint32)
+    return nibbles[values & 0xF] | (nibbles[values >> 4] << 4)
+
+
+def _parity(values):
+    """Paridade (XOR dos bits) de cada elemento de um vetor de inteiros sem sinal"""
+    values = values.copy()
+    shift = values.dtype.itemsize * 4
+    while shift:
+        values ^= values >> values.dtype.type(shift)
+        shift //= 2
+    return values & values.dtype.type(1)
+
+
+def difference_distribution_table(sbox):
+    """
+    DDT da S-box: ddt[a, b] = #{x : S(x) ^ S(x ^ a) = b}
+    """
+    size = len(sbox)
+    x = np.arange(size)
+    deltas = x[:, None]
+    outputs = sbox[x[None, :] ^ deltas] ^ sbox[x[None, :]]
+    ddt = np.zeros((size, size), dtype=np.int64)
+    np.add.at(ddt, (np.broadcast_to(deltas, outputs.shape), outputs), 1)
+    return ddt
+
+
+def linear_approximation_table(sbox):
+    """
+    LAT da S-box: lat[a, b] = #{x : a·x = b·S(x)} - n/2
+    (viés multiplicado por n; ±n/2 indica uma relação linear exata)
+    """
+    size = len(sbox)
+    x = np.arange(size, dtype=np.uint32)
+    input_parity = _parity(x[:, None] & x[None, :])       # [a, x]
+    output_parity = _parity(x[:, None] & sbox[None, :])   # [b, x]
+    agreements = (input_parity[:, None, :] == output_parity[None, :, :]).sum(axis=2)
+    return agreements.astype(np.int64) - size // 2
+
+
+def table_summary(ddt, lat):
+    """
+    Uniformidade diferencial (maior entrada da DDT com a ≠ 0) e linearidade
+    (maior |LAT| com b ≠ 0), também como probabilidade e viés
+    """
+    size = len(ddt)
+    return {
+        "size": size,
+        "differential_uniformity": int(ddt[1:].max()),
+        "max_differential_probability": float(ddt[1:].max() / size),
+        "linearity": int(np.abs(lat[:, 1:]).max()),
+        "max_linear_bias": float(np.abs(lat[:, 1:]).max() / size),
+    }
+
+
+def f_difference_distribution(delta_in, samples=EXPERIMENT_BATCH, subkey=0, seed=0):
+    """
+    Distribuição das diferenças de saída de F para uma diferença de entrada,
+    estimada sobre entradas aleatórias. Retorna [(diferença, probabilidade)]
+    em ordem decrescente de probabilidade.
+    """
+    rng = np.random.default_rng(seed)
+    right = rng.integers(0, 1 << 32, size=samples, dtype=np.uint32)
+    diffs = f_arrays(right, subkey) ^ f_arrays(right ^ np.uint32(delta_in), subkey)
+    values, counts = np.unique(diffs, return_counts=True)
+    order = np.argsort(counts)[::-1]
+    return [(int(values[i]), float(counts[i] / samples)) for i in order]
+
+
+def encrypt_blocks(blocks, subkeys):
+    """
+    Cifra em lote um vetor uint64 de blocos (metade esquerda nos 32 bits altos)
+    """
+    left = (blocks >> np.uint64(32)).astype(np.uint32)
+    right = (blocks & np.uint64(MASK_32)).astype(np.uint32)
+    high, low = _crypt_arrays(left, right, subkeys)
+    return (high.astype(np.uint64) << np.uint64(32)) | low.astype(np.uint64)
+
+
+def predicted_difference(delta, subkeys):
+    """
+    Propaga uma diferença pelas rodadas supondo F afim, isto é,
+    ΔF = F(ΔR) ^ F(0) para qualquer subchave
+    """
+    left, right = delta >> 32, delta & MASK_32
+    for subkey in subkeys:
+        f_right, f_zero = f_arrays(np.array([right, 0], dtype=np.uint32), subkey).tolist()
+        left, right = right, left ^ f_right ^ f_zero
+    return (right << 32) | left
+
+
+def _random_plaintext_batches(pairs, seed):
+    rng = np.random.default_rng(seed)
+    for start in range(0, pairs, EXPERIMENT_BATCH):
+        count = min(EXPERIMENT_BATCH, pairs - start)
+        yield rng.integers(0, 1 << 64, size=count, dtype=np.uint64)
+
+
+def differential_experiment(rounds, delta=DEFAULT_DELTA, pairs=EXPERIMENT_BATCH, key=DEFAULT_KEY, seed=0):
+    """
+    Experimento diferencial com textos escolhidos: cifra pairs pares
+    (P, P ^ delta) com a cifra reduzida a rounds rodadas e conta as diferenças
+    de saída. Retorna a diferença mais frequente, a probabilidade da diferença
+    prevista pela propagação afim e o número de diferenças distintas.
+    """
+    subkeys = FeistelCipher(key, rounds).subkeys
+    predicted = predicted_difference(delta, subkeys)
+    delta_array = np.uint64(delta)
+
+    diffs = []
+    for plaintexts in _random_plaintext_batches(pairs, seed):
+        diffs.append(encrypt_blocks(plaintexts, subkeys) ^ encrypt_blocks(plaintexts ^ delta_array, subkeys))
+    values, counts = np.unique(np.concatenate(diffs), return_counts=True)
+
+    top = int(np.argmax(counts))
+    hits = counts[values == np.uint64(predicted)]
+    return {
+        "rounds": rounds,
+        "pairs": pairs,
+        "delta": f"{delta:016X}",
+        "predicted": f"{predicted:016X}",
+        "predicted_probability": float(hits[0] / pairs) if len(hits) else 0.0,
+        "top_difference": f"{int(values[top]):016X}",
+        "top_probability": float(counts[top] / pairs),
+        "distinct_differences": int(len(values)),
+    }
+
+
+def affine_map(encrypt_block):
+    """
+    Recupera a forma afim E(P) = A·P ^ b da cifra com 65 textos escolhidos
+    encrypt_block: função bloco (int de 64 bits) -> bloco cifrado
+    Retorna (colunas de A como inteiros, b)
+    """
+    constant = encrypt_block(0)
+    columns = [encrypt_block(1 << i) ^ constant for i in range(64)]
+    return columns, constant
+
+
+def linear_mask(columns, output_mask):
+    """
+    Máscara de entrada α tal que α·P ^ β·E(P) é constante (β = output_mask),
+    isto é, α = Aᵀ·β
+    """
+    return sum(((bin(column & output_mask).count("1") & 1) << i) for i, column in enumerate(columns))
+
+
+def linear_experiment(rounds, input_mask, output_mask, samples=EXPERIMENT_BATCH, key=DEFAULT_KEY, seed=0):
+    """
+    Estima o viés |Pr[α·P = β·C] - 1/2| da aproximação linear (α, β)
+    sobre samples textos aleatórios cifrados com rounds rodadas
+    """
+    subkeys = FeistelCipher(key, rounds).subkeys
+    alpha, beta = np.uint64(input_mask), np.uint64(output_mask)
+    agreements = 0
+    for plaintexts in _random_plaintext_batches(samples, seed):
+        ciphertexts = encrypt_blocks(plaintexts, subkeys)
+        agreements += int(np.count_nonzero(_parity((plaintexts & alpha) ^ (ciphertexts & beta)) == 0))
+    return abs(agreements / samples - 0.5)
+
+
+def solve_affine(columns, constant, ciphertext):
+    """
+    Decifra um bloco sem a chave resolvendo A·P = C ^ b sobre GF(2)
+    (eliminação gaussiana com vetores de 64 bits como inteiros)
+    """
+    basis = {}
+    for i, column in enumerate(columns):
+        vector, combination = column, 1 << i
+        for bit in range(63, -1, -1):
+            if not (vector >> bit) & 1:
+                continue
+            if bit not in basis:
+                basis[bit] = (vector, combination)
+                break
+            vector ^= basis[bit][0]
+            combination ^= basis[bit][1]
+
+    target, plaintext = ciphertext ^ constant, 0
+    for bit in range(63, -1, -1):
+        if (target >> bit) & 1:
+            if bit not in basis:
+                raise ValueError("A parte linear da cifra não é inversível")
+            target ^= basis[bit][0]
+            plaintext ^= basis[bit][1]
+    return plaintext
+
+
+def sweep(rounds_range, pairs, delta=DEFAULT_DELTA, key=DEFAULT_KEY, seed=0):
+    """
+    Executa os experimentos diferencial e linear para cada número de rodadas
+    """
+    results = []
+    for rounds in rounds_range:
+        cipher = FeistelCipher(key, rounds)
+        start = time.perf_counter()
+        result = differential_experiment(rounds, delta, pairs, key, seed)
+
+        # Máscara de saída: bit menos significativo; a de entrada vem da forma afim
+        columns, _ = affine_map(lambda block: cipher._crypt_int(block, cipher.subkeys))
+        output_mask = 1
+        input_mask = linear_mask(columns, output_mask)
+        result["linear_masks"] = f"{input_mask:016X}/{output_mask:016X}"
+        result["linear_bias"] = linear_experiment(rounds, input_mask, output_mask, pairs, key, seed)
+        result["seconds"] = time.perf_counter() - start
+        results.append(result)
+    return results
+
+
+def parse_rounds(text):
+    """Converte '1-16' ou '4,8,16' em uma lista de números de rodadas"""
+    rounds = []
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            rounds.extend(range(int(first), int(last) + 1))
+        else:
+            rounds.append(int(part))
+    return rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Criptoanálise diferencial e linear da Cifra de Feistel")
+    parser.add_argument("--rounds", default="1-16", help="Rodadas a analisar, ex.: 1-16 ou 4,8,16")
+    parser.add_argument("--pairs", type=int, default=EXPERIMENT_BATCH, help="Pares (ou amostras) por experimento")
+    parser.add_argument("--delta", default=f"{DEFAULT_DELTA:016X}", help="Diferença de entrada (hex, 64 bits)")
+    parser.add_argument("--key", default=DEFAULT_KEY, help="Chave da cifra (hex)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos textos aleatórios")
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados em JSON")
+    args = parser.parse_args()
+
+    sbox = nibble_sbox()
+    nibble = table_summary(difference_distribution_table(sbox), linear_approximation_table(sbox))
+    sbox8 = byte_sbox()
+    byte = table_summary(difference_distribution_table(sbox8), linear_approximation_table(sbox8))
+    results = sweep(parse_rounds(args.rounds), args.pairs, int(args.delta, 16), args.key, args.seed)
+
+    # Ataque sem chave: recupera a forma afim da cifra completa e decifra um bloco
+    cipher = FeistelCipher(args.key)
+    columns, constant = affine_map(lambda block: cipher._crypt_int(block, cipher.subkeys))
+    plaintext = int("0123456789ABCDEF", 16)
+    recovered = solve_affine(columns, constant, cipher._crypt_int(plaintext, cipher.subkeys))
+
+    if args.json:
+        json.dump({"nibble_sbox": nibble, "byte_sbox": byte, "rounds": results,
+                   "affine_recovery": recovered == plaintext}, sys.stdout, indent=2)
+        print()
+        return
+
+    print("Criptoanálise da Cifra de Feistel\n")
+    for name, summary in (("S-box de 4 bits", nibble), ("Substituição de 8 bits", byte)):
+        print(f"{name}: uniformidade diferencial {summary['differential_uniformity']}/{summary['size']} "
+              f"(p = {summary['max_differential_probability']:.3f}), "
+              f"linearidade {summary['linearity']}/{summary['size']} "
+              f"(viés = {summary['max_linear_bias']:.3f})")
+
+    print(f"\nDiferença de entrada: {args.delta.upper()}  ({args.pairs:,d} pares por rodada)")
+    print(f"{'Rodadas':>7}  {'Diferença prevista':>18}  {'Prob.':>6}  {'Distintas':>9}  {'Viés linear':>11}  {'Tempo':>7}")
+    for result in results:
+        print(f"{result['rounds']:>7}  {result['predicted']:>18}  {result['predicted_probability']:>6.3f}  "
+              f"{result['distinct_differences']:>9,d}  {result['linear_bias']:>11.3f}  {result['seconds']:>6.2f}s")
+
+    print(f"\nRecuperação afim (65 textos escolhidos, sem a chave): "
+          f"{'SUCESSO' if recovered == plaintext else 'FALHOU'} -> {recovered:016X}")
+
+
+if __name__ == "__main__":
+    main()